@@ -19,13 +19,17 @@ import time
 import uuid
 import json
 import logging
+import queue
+import threading
+import weakref
+from concurrent.futures import Future
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional, Union, Tuple, List
 
 from PIL import Image
 
-__all__ = ["CephalometricPipeline"]
+__all__ = ["CephalometricPipeline", "PipelineWorker"]
 
 # --------------------------------------------------------------------------------------
 # 로깅 설정 (Streamlit/CLI 모두에서 보기 좋은 형식)
@@ -40,6 +44,8 @@ logger.setLevel(logging.INFO)
 
 # --------------------------------------------------------------------------------------
 # 로컬 모듈 임포트 (패키지 실행/직접 실행 모두 지원)
+# EMR 데모(src/demo/emr_system.py)는 이 모듈을 get_pipeline() 안에서 지연 임포트하므로,
+# 무거운 의존성(모델 프레임워크 등)을 추가할 때도 모듈 최상단이 아닌 사용 시점에 임포트할 것
 # --------------------------------------------------------------------------------------
 try:
     # 패키지 컨텍스트 (src를 패키지 루트로 인식)
@@ -359,35 +365,142 @@ class CephalometricPipeline:
         self,
         image_list: List[Union[str, Image.Image]],
         meta_list: Optional[List[Dict[str, Any]]] = None,
+        anchors: Optional[Dict[str, Tuple[float, float]]] = None,
+        run_ids: Optional[List[Optional[str]]] = None,
     ) -> List[Dict[str, Any]]:
-        """여러 이미지를 순차 처리."""
+        """
+        여러 이미지를 한 번의 호출로 처리.
+
+        데모 추론 엔진은 이미지 단위 휴리스틱이므로 내부적으로는 순차 실행하며,
+        anchors(Or/Po 보정)는 모든 이미지에 동일하게 적용됩니다.
+        run_ids를 주면 항목별 실행 ID로 사용하고(None 항목은 run()이 새로 발급),
+        생략 시 batch_001, batch_002, ... 를 부여합니다.
+        """
         if meta_list is None:
             meta_list = [{} for _ in image_list]
         if len(meta_list) != len(image_list):
             raise ValueError("이미지 개수와 메타데이터 개수가 일치해야 합니다.")
+        if run_ids is None:
+            run_ids = [f"batch_{i:03d}" for i in range(1, len(image_list) + 1)]
+        elif len(run_ids) != len(image_list):
+            raise ValueError("이미지 개수와 실행 ID 개수가 일치해야 합니다.")
 
         results: List[Dict[str, Any]] = []
         batch_start = time.perf_counter()
 
         logger.info(f"🔄 배치 처리 시작: {len(image_list)}개 이미지")
-        for i, (img, meta) in enumerate(zip(image_list, meta_list), start=1):
-            rid = f"batch_{i:03d}"
+        for i, (img, meta, rid) in enumerate(zip(image_list, meta_list, run_ids), start=1):
+            # 결과는 이미지당 정확히 한 건만 추가 (로그 출력 중 예외가 나도 결과 목록이 어긋나지 않도록 분리)
             try:
-                res = self.run(img, meta=meta, run_id=rid)
-                results.append(res)
-                if res.get("success"):
-                    ms = res["performance"]["total_time_ms"]
-                    logger.info(f"   ✅ {i}/{len(image_list)} 완료 ({ms:.1f}ms)")
-                else:
-                    logger.warning(f"   ⚠️ {i}/{len(image_list)} 실패: {res.get('error', {}).get('message')}")
+                res = self.run(img, meta=meta, anchors=anchors, run_id=rid)
             except Exception as e:
-                results.append({"run_id": rid, "success": False, "error": {"type": type(e).__name__, "message": str(e)}})
+                results.append({"run_id": rid or str(uuid.uuid4())[:8], "success": False, "error": {"type": type(e).__name__, "message": str(e)}})
                 logger.exception(f"   ❌ {i}/{len(image_list)} 예외")
+                continue
+            results.append(res)
+            if res.get("success"):
+                ms = res.get("performance", {}).get("total_time_ms", 0.0)
+                logger.info(f"   ✅ {i}/{len(image_list)} 완료 ({ms:.1f}ms)")
+            else:
+                logger.warning(f"   ⚠️ {i}/{len(image_list)} 실패: {res.get('error', {}).get('message')}")
 
         logger.info(f"🏁 배치 처리 완료: {time.perf_counter() - batch_start:.2f}s")
         return results
 
 
+class PipelineWorker:
+    """
+    여러 세션/사용자가 공유하는 파이프라인 앞단의 요청 큐 + 백그라운드 워커
+
+    - submit()은 요청을 큐에 넣고 Future를 즉시 반환 (호출부는 future.result(timeout)로 대기)
+    - 워커 스레드 하나가 큐를 비우며, 그 시점에 이미 쌓여 있는 요청(최대 max_batch_size개)을
+      앵커 설정별로 묶어 run_batch로 한 번에 처리. 추가 요청을 기다리는 배치 창은 두지 않으므로
+      단건 요청은 대기 없이 바로 run()으로 실행됨
+    - 실행 ID는 호출부가 준 값(없으면 run()이 발급하는 UUID)을 그대로 유지
+    - 파이프라인 접근이 이 스레드로 직렬화되므로 실행 통계(stats) 갱신 경합도 없음
+    - 스레드는 워커를 약한 참조로만 잡으므로, 워커가 버려지면(예: 캐시 초기화) 스스로 종료
+    """
+
+    def __init__(self, pipeline: CephalometricPipeline, max_batch_size: int = 8):
+        self.pipeline = pipeline
+        self.max_batch_size = max_batch_size
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(
+            target=PipelineWorker._loop, args=(weakref.ref(self),), name="ceph-pipeline-worker", daemon=True
+        )
+        self._thread.start()
+
+    def submit(
+        self,
+        image_input: Union[str, Image.Image],
+        meta: Optional[Dict[str, Any]] = None,
+        anchors: Optional[Dict[str, Tuple[float, float]]] = None,
+        run_id: Optional[str] = None,
+    ) -> Future:
+        """분석 요청을 큐에 넣고 결과 Future를 반환."""
+        if self._closed.is_set():
+            raise RuntimeError("PipelineWorker가 종료되었습니다.")
+        future: Future = Future()
+        self._queue.put((image_input, meta or {}, anchors, run_id, future))
+        return future
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """새 요청을 막고, 대기 중인 요청을 처리한 뒤 워커 스레드를 종료."""
+        self._closed.set()
+        self._thread.join(timeout)
+
+    def _collect(self) -> List[Tuple[Any, Dict[str, Any], Any, Optional[str], Future]]:
+        """첫 요청을 기다린 뒤, 이미 큐에 쌓인 요청만 max_batch_size까지 추가로 꺼냄 (추가 대기 없음)."""
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    @staticmethod
+    def _loop(ref: "weakref.ref[PipelineWorker]") -> None:
+        while True:
+            worker = ref()
+            if worker is None or (worker._closed.is_set() and worker._queue.empty()):
+                return
+            worker._process(worker._collect())
+            del worker
+
+    def _process(self, batch: List[Tuple[Any, Dict[str, Any], Any, Optional[str], Future]]) -> None:
+        # 앵커(Or/Po 보정)가 같은 요청끼리 묶어 처리 (단건은 run, 여러 건은 run_batch 한 번)
+        groups: Dict[Any, List[Tuple[Any, Dict[str, Any], Any, Optional[str], Future]]] = {}
+        for item in batch:
+            anchors = item[2]
+            key = tuple(sorted(anchors.items())) if anchors else None
+            groups.setdefault(key, []).append(item)
+        for items in groups.values():
+            live = [item for item in items if item[4].set_running_or_notify_cancel()]
+            if not live:
+                continue
+            try:
+                if len(live) == 1:
+                    image_input, meta, anchors, run_id, _ = live[0]
+                    results = [self.pipeline.run(image_input, meta=meta, anchors=anchors, run_id=run_id)]
+                else:
+                    results = self.pipeline.run_batch(
+                        [item[0] for item in live], [item[1] for item in live], anchors=live[0][2],
+                        run_ids=[item[3] for item in live],
+                    )
+            except Exception as e:
+                logger.exception("PipelineWorker 처리 실패")
+                for item in live:
+                    item[4].set_exception(e)
+            else:
+                for item, res in zip(live, results):
+                    item[4].set_result(res)
+
+
 # --------------------------------------------------------------------------------------
 # 로컬 테스트용 진입점
 # --------------------------------------------------------------------------------------
@@ -18,10 +18,15 @@ os.environ.setdefault("KMP_DUPLICATE_LIB_OK", "TRUE")
 import streamlit as st
 import sys
 import time
-from PIL import Image, ImageDraw
+from PIL import Image, ImageDraw, ImageFont
 import base64
+import hashlib
+import re
+import string
+from collections import deque
 from io import BytesIO
 import numpy as np
+import pandas as pd
 from datetime import datetime
 
 # 프로젝트 루트 경로 추가
@@ -40,6 +45,31 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# 스크립트 실행(rerun) 단위 타임스탬프 - 한 번의 실행 안에서는 재사용
+RUN_TS = datetime.now()
+RUN_TS_STR = RUN_TS.strftime("%Y-%m-%d %H:%M:%S")
+
+# ---------- 캐시 설정 ----------
+# 프로세스 메모리에 상주하는 캐시 목록 (RAM 사용량 점검용)
+#   st.cache_resource : get_pipeline - 파이프라인 싱글턴 ((demo_mode, seed)별 1개, 최대 2건 = 데모/실제 모드)
+#                       get_pipeline_worker - 분석 요청 배치 워커 (파이프라인당 1개, 최대 2건)
+#                       _get_font - 라벨 폰트 (최대 8건)
+#                       _viewer_canvas - 이미지별 오버레이 캔버스 RGB 배열, 읽기 전용 (최대 8건)
+#                       _disk_stamp - 랜드마크 점 스탬프(반지름별 픽셀 오프셋), 읽기 전용 (최대 16건)
+#   st.cache_data     : _emr_css - 테마 CSS (1건)
+#                       get_konyang_logo_base64 - 로고 (MIME, Base64) (1건)
+#                       _hospital_header_html - 로고 포함 상단 헤더 HTML (1건)
+#                       _anb_sensitivity_frame - ANB 민감도 곡선 (1건)
+#                       landmarks_to_df - 랜드마크 좌표표 (최대 8건)
+#                       _demo_image_data - 대표 도면 RGB 버퍼/키 (1건)
+#                       _overlay_cached,
+#                       _landmark_overlay_cached - 이미지별 오버레이 표시용 JPEG (각 최대 8건)
+#                       _generate_clinical_report_cached - 리포트 HTML (최대 16건)
+#                       _analyze_cached - (이미지, 환자 정보, 기준점, 모드)별 분석 결과 (최대 16건, 오류 결과 제외)
+# 밑줄로 시작하는 인자(_image)는 해시 대상에서 제외 - 이미지는 로드 시 계산해 둔 img_key로 식별
+# 데이터 캐시는 _CACHE_TTL 이후 만료되며, 개발 모드(KONYANG_DEV_MODE=1)에서는 수동 초기화 가능
+_CACHE_TTL = 24 * 60 * 60
+
 # ---------- PDF 변환 유틸 ----------
 def html_to_pdf_bytes(html: str) -> bytes:
     """
@@ -57,8 +87,8 @@ def html_to_pdf_bytes(html: str) -> bytes:
         raise RuntimeError("PDF 생성 중 오류가 발생했습니다.")
     return pdf_io.getvalue()
 
-# 건양대 EMR 테마 CSS
-st.markdown("""
+# 건양대 EMR 테마 CSS (정적 문자열 → 모듈 상수)
+_EMR_CSS = """
 <style>
     :root {
         --ky-pine-green: #2D5530;
@@ -362,11 +392,61 @@ st.markdown("""
         box-shadow: 0 5px 12px rgba(45, 85, 48, 0.4);
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+@st.cache_data(show_spinner=False)
+def _emr_css() -> str:
+    """테마 CSS를 주석/공백 제거(최소화)한 뒤 캐시 - 재실행마다 전송되는 바이트를 줄임"""
+    css = re.sub(r"/\*.*?\*/", "", _EMR_CSS, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};])\s*", r"\1", css).strip()
+
+# 주의: Streamlit은 재실행 때 다시 출력되지 않은 요소를 제거하므로 세션당 1회만 출력하면
+# 두 번째 실행부터 스타일이 사라짐 → 매 실행 출력하되 최소화된 캐시 문자열을 사용
+st.markdown(_emr_css(), unsafe_allow_html=True)
+
+# ---------- 임상 지표 정상 범위 / 상태 표 ----------
+NORMAL_RANGES = {'SNA': (80, 84), 'SNB': (78, 82), 'ANB': (0, 4), 'FMA': (25, 30)}
+# (상태, 배지 클래스, 색상, 아이콘) - 인덱스 0: 정상, 1: 경계(범위 ±2° 이내), 2: 이탈
+_STATUS = (
+    ("정상", "status-badge-normal", "#2D5530", "✅"),
+    ("경계", "status-badge-warning", "#FFA726", "⚠️"),
+    ("이탈", "status-badge-error", "#C53030", "🚨"),
+)
 
+def _classify_metric(name, value):
+    """단일 지표의 (상태, 배지 클래스, 색상, 아이콘) 반환"""
+    normal_min, normal_max = NORMAL_RANGES[name]
+    if normal_min <= value <= normal_max:
+        return _STATUS[0]
+    if normal_min - 2 <= value <= normal_max + 2:
+        return _STATUS[1]
+    return _STATUS[2]
+
+def _classify_metrics(values, lows, highs):
+    """여러 지표의 상태 인덱스(0/1/2)를 NumPy로 한 번에 계산"""
+    values = np.asarray(values, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+    highs = np.asarray(highs, dtype=float)
+    return np.where((values >= lows) & (values <= highs), 0,
+                    np.where((values < lows - 2) | (values > highs + 2), 2, 1))
+
+# 로고 파일이 없을 때 사용할 SVG 로고 (임포트 시 한 번만 인코딩)
+_LOGO_SVG = """
+    <svg width="120" height="50" viewBox="0 0 120 50" xmlns="http://www.w3.org/2000/svg">
+        <rect width="120" height="50" fill="white" rx="8" stroke="#2D5530" stroke-width="2"/>
+        <circle cx="25" cy="25" r="12" fill="#2D5530"/>
+        <circle cx="25" cy="25" r="6" fill="white"/>
+        <text x="50" y="18" font-family="Arial, sans-serif" font-size="11" font-weight="bold" fill="#2D5530">건양대학교</text>
+        <text x="50" y="32" font-family="Arial, sans-serif" font-size="9" fill="#7FB069">의료원</text>
+        <text x="50" y="42" font-family="Arial, sans-serif" font-size="7" fill="#2D5530">KONYANG</text>
+    </svg>
+    """
+_FALLBACK_LOGO_B64 = base64.b64encode(_LOGO_SVG.encode("utf-8")).decode("ascii")
+
+@st.cache_data(show_spinner=False)
 def get_konyang_logo_base64():
-    """건양대 로고를 Base64로 인코딩"""
-    import base64
+    """건양대 로고를 (MIME 타입, Base64) 튜플로 반환 - 정적 파일이므로 리런 간 캐시"""
     logo_paths = [
         os.path.join(project_root, "data/assets/konyang_logo.png"),
         "data/assets/konyang_logo.png",
@@ -375,44 +455,58 @@ def get_konyang_logo_base64():
     ]
     for logo_path in logo_paths:
         try:
-            if os.path.exists(logo_path):
-                with open(logo_path, "rb") as f:
-                    logo_data = f.read()
-                return base64.b64encode(logo_data).decode()
-        except Exception:
+            with open(logo_path, "rb") as f:
+                logo_data = f.read()
+        except OSError:
             continue
-    # 로고 파일이 없으면 SVG 로고 생성
-    logo_svg = """
-    <svg width="120" height="50" viewBox="0 0 120 50" xmlns="http://www.w3.org/2000/svg">
-        <rect width="120" height="50" fill="white" rx="8" stroke="#2D5530" stroke-width="2"/>
-        <circle cx="25" cy="25" r="12" fill="#2D5530"/>
-        <circle cx="25" cy="25" r="6" fill="white"/>
-        <text x="50" y="18" font-family="Arial, sans-serif" font-size="11" font-weight="bold" fill="#2D5530">건양대학교</text>
-        <text x="50" y="32" font-family="Arial, sans-serif" font-size="9" fill="#7FB069">의료원</text>
-        <text x="50" y="42" font-family="Arial, sans-serif" font-size="7" fill="#2D5530">KONYANG</text>
-    </svg>
-    """
-    return base64.b64encode(logo_svg.encode()).decode()
+        return "image/png", base64.b64encode(logo_data).decode("ascii")
+    # 로고 파일이 없으면 미리 인코딩해 둔 SVG 로고 사용
+    return "image/svg+xml", _FALLBACK_LOGO_B64
 
 def initialize_session_state():
-    """세션 상태 초기화"""
+    """세션 상태 초기화 (기본값 채우기는 세션당 한 번 - 이후 재실행은 센티널 확인만)"""
+    if "session_ready" not in st.session_state:
+        _apply_session_defaults()
+        st.session_state.session_ready = True
+    # 시각화 설정 위젯은 분석 탭에서만 그려지므로, 다른 탭에 있는 동안
+    # 위젯 상태가 정리되지 않도록 매 실행 값을 다시 지정해 유지
+    for k in _VIEW_SETTING_KEYS:
+        st.session_state[k] = st.session_state[k]
+
+def _apply_session_defaults():
+    """없는 세션 키만 기본값으로 채움 (모든 키가 항상 존재하므로 본문은 `is not None`으로만 확인)"""
     defaults = dict(
-        pipeline=None,
+        pipeline_key=None,
         analysis_results=None,
         demo_mode=True,
         batch_running=False,
+        batch_results=None,
         current_tab="viewer",
         show_phi=False,
-        audit_logs=[],
+        audit_logs=deque(maxlen=50),
         overlay_thumbnail=None,
+        overlay_thumbnail_jpeg=None,
+        report_thumb_uri=None,
         input_image=None,
+        input_image_key=None,
+        input_image_bytes=None,
+        full_overlay=None,
+        uploaded_file_id=None,
+        dev_mode=os.environ.get("KONYANG_DEV_MODE") == "1",
+        landmark_size=_DEFAULT_LANDMARK_SIZE,
+        show_labels=True,
+        show_clinical_overlay=True,
     )
     for k, v in defaults.items():
         if k not in st.session_state:
             st.session_state[k] = v
 
 def add_audit_log(action, details=""):
-    """감사 로그 추가"""
+    """감사 로그 추가 (최근 50건 유지, 직전과 동일한 이벤트는 중복 기록하지 않음)"""
+    logs = st.session_state.audit_logs
+    # fragment 재실행 시에는 RUN_TS가 갱신되지 않으므로 이벤트 시각은 직접 측정
+    if logs and logs[-1]["action"] == action and logs[-1]["details"] == details:
+        return
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     log_entry = {
         "timestamp": timestamp,
@@ -420,19 +514,13 @@ def add_audit_log(action, details=""):
         "details": details,
         "user": "김○○ 의사" if not st.session_state.show_phi else "김철수 의사"
     }
-    st.session_state.audit_logs.append(log_entry)
-    if len(st.session_state.audit_logs) > 50:
-        st.session_state.audit_logs = st.session_state.audit_logs[-50:]
+    logs.append(log_entry)
 
-def render_hospital_header():
-    """실제 EMR처럼 보이는 상단 헤더 (건양대 로고 포함)"""
-    logo_base64 = get_konyang_logo_base64()
-    logo_exists = any(os.path.exists(path) for path in [
-        os.path.join(project_root, "data/assets/konyang_logo.png"),
-        "data/assets/konyang_logo.png"
-    ])
-    logo_mime_type = "image/png" if logo_exists else "image/svg+xml"
-    st.markdown(f"""
+@st.cache_data(show_spinner=False)
+def _hospital_header_html() -> str:
+    """상단 헤더 HTML (로고 Base64 포함 - 정적이므로 1회만 조립)"""
+    logo_mime_type, logo_base64 = get_konyang_logo_base64()
+    return f"""
     <div class="emr-header">
         <div class="hospital-brand">
             <img src="data:{logo_mime_type};base64,{logo_base64}" alt="건양대학교 의료원" 
@@ -444,79 +532,99 @@ def render_hospital_header():
             접속: ceph-ai.kyuh.ac.kr | 🔒 SSL | 응답시간: 18ms | 세션: EMR-2025-001
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """
+
+def render_hospital_header():
+    """실제 EMR처럼 보이는 상단 헤더 (건양대 로고 포함)"""
+    st.markdown(_hospital_header_html(), unsafe_allow_html=True)
+
+def _on_phi_toggle():
+    """PHI 표시 전환 감사 로그 (checkbox 콜백)"""
+    if st.session_state.show_phi:
+        add_audit_log("PHI 표시", "개인정보 마스킹 해제")
+    else:
+        add_audit_log("PHI 숨김", "개인정보 마스킹 적용")
+
+# 환자 밴드 칸 HTML (정적 칸은 완성 문자열, PHI 칸만 템플릿 치환)
+_BAND_CELL_TMPL = string.Template("""
+        <div style="background: #f8fafc; padding: 8px 12px; border-radius: 6px; border: 1px solid #e2e8f0;">
+            $content
+        </div>
+        """)
+_BAND_PATIENT_HTML = {
+    show_phi: _BAND_CELL_TMPL.substitute(content=f"<strong>👤 {name}</strong> (M/34세) | ID: {pid}")
+    for show_phi, name, pid in ((False, "김○○", "KY-****-001"), (True, "김철수", "KY-2024-001"))
+}
+_BAND_DATE_HTML = _BAND_CELL_TMPL.substitute(content="🗓️ 2025.01.15 14:35")
+_BAND_STUDY_HTML = _BAND_CELL_TMPL.substitute(content="📷 측면두부 X-ray | C250115-001")
 
 def render_patient_band():
     """환자 정보 상단 밴드 (PHI 마스킹)"""
-    patient_name = "김○○" if not st.session_state.show_phi else "김철수"
-    patient_id = "KY-****-001" if not st.session_state.show_phi else "KY-2024-001"
     col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
-    with col1:
-        st.markdown(f"""
-        <div style="background: #f8fafc; padding: 8px 12px; border-radius: 6px; border: 1px solid #e2e8f0;">
-            <strong>👤 {patient_name}</strong> (M/34세) | ID: {patient_id}
-        </div>
-        """, unsafe_allow_html=True)
-    with col2:
-        st.markdown("""
-        <div style="background: #f8fafc; padding: 8px 12px; border-radius: 6px; border: 1px solid #e2e8f0;">
-            🗓️ 2025.01.15 14:35
-        </div>
-        """, unsafe_allow_html=True)
-    with col3:
-        st.markdown("""
-        <div style="background: #f8fafc; padding: 8px 12px; border-radius: 6px; border: 1px solid #e2e8f0;">
-            📷 측면두부 X-ray | C250115-001
-        </div>
-        """, unsafe_allow_html=True)
+    col1.markdown(_BAND_PATIENT_HTML[bool(st.session_state.show_phi)], unsafe_allow_html=True)
+    col2.markdown(_BAND_DATE_HTML, unsafe_allow_html=True)
+    col3.markdown(_BAND_STUDY_HTML, unsafe_allow_html=True)
     with col4:
-        phi_toggle = st.checkbox("PHI 보기", key="phi_toggle", help="개인정보 마스킹 해제")
-        if phi_toggle != st.session_state.show_phi:
-            st.session_state.show_phi = phi_toggle
-            if phi_toggle:
-                add_audit_log("PHI 표시", "개인정보 마스킹 해제")
-            else:
-                add_audit_log("PHI 숨김", "개인정보 마스킹 적용")
-            st.rerun()
+        # 위젯이 show_phi 상태를 직접 소유 → 콜백이 본문 실행 전에 반영되므로 추가 rerun 불필요
+        st.checkbox("PHI 보기", key="show_phi", on_change=_on_phi_toggle, help="개인정보 마스킹 해제")
+
+_NAV_OPTIONS = [
+    ("🖼️ 이미지 뷰어", "viewer", "이미지 로드 및 확인"),
+    ("📊 AI 분석결과", "analysis", "자동 분석 및 결과"),
+    ("⚙️ What-If 시뮬레이터", "simulator", "가상 시나리오 분석"),
+    ("📝 임상 리포트", "report", "결과 리포트 생성"),
+    ("🔍 이전 검사", "history", "과거 검사 이력"),
+    ("⚡ QC 품질관리", "qc", "품질 관리 및 검증")
+]
+_NAV_LABELS = {key: label for label, key, _ in _NAV_OPTIONS}
+_NAV_DESCS = {key: desc for _, key, desc in _NAV_OPTIONS}
+
+def _on_tab_change():
+    """탭 전환 감사 로그 (radio 콜백)"""
+    add_audit_log("탭 전환", f"{_NAV_LABELS[st.session_state.current_tab]} 탭으로 이동")
 
 def render_medical_navigation():
-    """의료진 워크플로우 기반 네비게이션"""
+    """의료진 워크플로우 기반 네비게이션 (단일 radio 위젯이 current_tab 상태를 직접 소유)"""
     st.markdown("## 📋 분석 워크플로우")
-    nav_options = [
-        ("🖼️ 이미지 뷰어", "viewer", "이미지 로드 및 확인"),
-        ("📊 AI 분석결과", "analysis", "자동 분석 및 결과"),
-        ("⚙️ What-If 시뮬레이터", "simulator", "가상 시나리오 분석"),
-        ("📝 임상 리포트", "report", "결과 리포트 생성"),
-        ("🔍 이전 검사", "history", "과거 검사 이력"),
-        ("⚡ QC 품질관리", "qc", "품질 관리 및 검증")
-    ]
-    for label, key, desc in nav_options:
-        if st.button(f"{label}", key=f"nav_{key}", use_container_width=True,
-                     type="primary" if st.session_state.current_tab == key else "secondary"):
-            st.session_state.current_tab = key
-            add_audit_log(f"탭 전환", f"{label} 탭으로 이동")
-            st.rerun()
-        if st.session_state.current_tab == key:
-            st.markdown(f"<small style='color: #666;'>{desc}</small>", unsafe_allow_html=True)
+    st.radio("워크플로우", options=list(_NAV_LABELS), format_func=_NAV_LABELS.get,
+             label_visibility="collapsed", key="current_tab", on_change=_on_tab_change)
+    st.markdown(f"<small style='color: #666;'>{_NAV_DESCS[st.session_state.current_tab]}</small>",
+                unsafe_allow_html=True)
+
+# 분류 번호(1~3)로 바로 인덱싱하는 라벨 표 / 라벨별 (테마 색상, 설명)
+_CLASS_LABELS = (None, "Class I", "Class II", "Class III")
+_CLASS_NUMBERS = {"Class I": 1, "Class II": 2, "Class III": 3}
+_CLASS_INFO = {
+    "Class I": ("#2D5530", "골격적으로 정상"),
+    "Class II": ("#C53030", "골격적으로 상악 과성장"),
+    "Class III": ("#5B9BD5", "골격적으로 하악 과성장"),
+}
+_CLASS_INFO_DEFAULT = ("#2D5530", "")
+
+def _class_label(c):
+    """분류 번호 → 라벨 (범위 밖이면 None)"""
+    return _CLASS_LABELS[c] if isinstance(c, int) and 1 <= c <= 3 else None
 
 def _normalize_classification_display(classification: dict):
     """
     분류 표시에 사용할 label/number/confidence를 일관되게 반환
     """
-    class_map_num_to_label = {1: "Class I", 2: "Class II", 3: "Class III"}
-    label_map_to_num = {"Class I": 1, "Class II": 2, "Class III": 3}
-
     predicted_class = classification.get("predicted_class")
     predicted_label = classification.get("predicted_label")
     confidence = float(classification.get("confidence", 0.0))
 
     if predicted_class is None and predicted_label:
-        predicted_class = label_map_to_num.get(predicted_label)
-    if predicted_label is None and predicted_class in class_map_num_to_label:
-        predicted_label = class_map_num_to_label[predicted_class]
+        predicted_class = _CLASS_NUMBERS.get(predicted_label)
+    if predicted_label is None:
+        predicted_label = _class_label(predicted_class)
 
     return predicted_label or "Unknown", predicted_class, confidence
 
+def _probabilities_display(classification):
+    """분류 확률을 표시용 (라벨, 확률) 리스트로 한 번만 정규화 (숫자/라벨 키 혼용 방지)"""
+    return [(_class_label(k) or str(k), float(v))
+            for k, v in classification.get("probabilities", {}).items()]
+
 def render_performance_dashboard(pipeline_result):
     """EMR급 성능 대시보드"""
     performance = pipeline_result.get('performance', {})
@@ -525,7 +633,7 @@ def render_performance_dashboard(pipeline_result):
     total_time = float(performance.get('total_time_ms', 0.0))
     quality_score = float(quality.get('overall_score', 0.0)) * 100.0
     label, predicted_class, confidence = _normalize_classification_display(classification)
-    current_time = datetime.now().strftime("%H:%M:%S")
+    current_time = RUN_TS_STR[11:]
     st.markdown(f"""
     <div class="performance-strip">
         <div>⚡ 총 처리시간: <strong>{total_time:.1f}ms</strong></div>
@@ -561,8 +669,8 @@ def render_qc_panel(qc_results=None):
             st.markdown("</div>", unsafe_allow_html=True)
 
 def generate_clinical_report(result, patient_info):
-    """인쇄 가능한 임상 리포트(HTML)"""
-    current_time = datetime.now().strftime("%Y년 %m월 %d일 %H시 %M분")
+    """인쇄 가능한 임상 리포트(HTML) - 입력을 해시 가능한 원시값으로 정리해 캐시 버전 호출"""
+    current_time = RUN_TS.strftime("%Y년 %m월 %d일 %H시 %M분")
     patient_name = patient_info.get('name', '김○○' if not st.session_state.show_phi else '김철수')
     patient_id = patient_info.get('id', 'KY-****-001' if not st.session_state.show_phi else 'KY-2024-001')
     classification = result.get('classification', {})
@@ -570,8 +678,23 @@ def generate_clinical_report(result, patient_info):
 
     # 표시용 라벨/신뢰도 정규화
     label, _, confidence = _normalize_classification_display(classification)
+    classification_tuple = (label, confidence,
+                            classification.get('classification_basis', 'AI 기반 자동 분석'))
 
-    report_html = f"""
+    metrics_tuple = tuple(
+        (metric_name, float(metric_data['value'])) + NORMAL_RANGES[metric_name]
+        for metric_name, metric_data in clinical_metrics.items()
+        if metric_name in NORMAL_RANGES
+    )
+    return _generate_clinical_report_cached(patient_name, patient_id, classification_tuple,
+                                            metrics_tuple, current_time)
+
+@st.cache_data(show_spinner=False, max_entries=16, ttl=_CACHE_TTL)
+def _generate_clinical_report_cached(patient_name, patient_id, classification_tuple, metrics_tuple, current_time):
+    """임상 리포트 HTML 생성 (동일 입력이면 캐시된 HTML 재사용)"""
+    label, confidence, classification_basis = classification_tuple
+
+    parts = [f"""
     <div class="clinical-report" style="padding: 2rem; background: white; border-radius: 8px; box-shadow: 0 4px 12px rgba(0,0,0,0.1);">
         <header class="report-header" style="text-align: center; border-bottom: 2px solid #2D5530; padding-bottom: 20px; margin-bottom: 30px;">
             <h1 style="color: #2D5530; margin: 0;">건양대학교의료원</h1>
@@ -594,7 +717,7 @@ def generate_clinical_report(result, patient_info):
             <div class="classification-result" style="background: #f8fafc; padding: 20px; border-radius: 8px; margin: 15px 0;">
                 <h4 style="color: #2D5530;">진단 분류: {label}</h4>
                 <p><strong>신뢰도:</strong> {confidence * 100:.1f}%</p>
-                <p><strong>임상적 의미:</strong> {classification.get('classification_basis', 'AI 기반 자동 분석')}</p>
+                <p><strong>임상적 의미:</strong> {classification_basis}</p>
             </div>
             
             <div class="metrics-table">
@@ -609,23 +732,22 @@ def generate_clinical_report(result, patient_info):
                         </tr>
                     </thead>
                     <tbody>
-    """
-    normal_ranges = {'SNA': (80, 84), 'SNB': (78, 82), 'ANB': (0, 4), 'FMA': (25, 30)}
-    for metric_name, metric_data in clinical_metrics.items():
-        if metric_name in normal_ranges:
-            value = float(metric_data['value'])
-            normal_min, normal_max = normal_ranges[metric_name]
-            status = "정상" if normal_min <= value <= normal_max else "비정상"
-            status_color = "#10b981" if status == "정상" else "#ef4444"
-            report_html += f"""
+    """]
+    status_indices = ()
+    if metrics_tuple:
+        _, values, lows, highs = zip(*metrics_tuple)
+        status_indices = _classify_metrics(values, lows, highs)
+    for (metric_name, value, normal_min, normal_max), status_idx in zip(metrics_tuple, status_indices):
+        status, _, status_color, _ = _STATUS[status_idx]
+        parts.append(f"""
                         <tr>
                             <td style="padding: 8px; border: 1px solid #ddd;">{metric_name}</td>
                             <td style="padding: 8px; border: 1px solid #ddd;">{value:.1f}°</td>
                             <td style="padding: 8px; border: 1px solid #ddd;">{normal_min}-{normal_max}°</td>
                             <td style="padding: 8px; border: 1px solid #ddd; color: {status_color}; font-weight: bold;">{status}</td>
                         </tr>
-            """
-    report_html += f"""
+            """)
+    parts.append(f"""
                     </tbody>
                 </table>
             </div>
@@ -647,8 +769,8 @@ def generate_clinical_report(result, patient_info):
             </div>
         </footer>
     </div>
-    """
-    return report_html
+    """)
+    return "".join(parts)
 
 def render_audit_log():
     """감사 로그 시스템"""
@@ -660,17 +782,56 @@ def render_audit_log():
         </div>
         """, unsafe_allow_html=True)
 
+def _pil_to_np(image):
+    """PIL 이미지(또는 캐시된 읽기 전용 캔버스 배열)를 쓰기 가능한 RGB uint8 배열로 변환"""
+    if isinstance(image, np.ndarray):
+        return image.copy()
+    return np.array(image.convert("RGB"), dtype=np.uint8)
+
+def _np_to_pil(arr):
+    """RGB uint8 배열을 PIL 이미지로 변환"""
+    return Image.fromarray(arr)
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _disk_stamp(r: int):
+    """반지름 r 원(점 스탬프)의 픽셀 오프셋 (dy, dx) - 반지름별로 한 번만 만들고 읽기 전용으로 공유"""
+    dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+    inside = dy * dy + dx * dx <= r * r
+    dy, dx = dy[inside], dx[inside]
+    dy.flags.writeable = False
+    dx.flags.writeable = False
+    return dy, dx
+
+def _fill_disks(arr, centers, radius, color):
+    """
+    여러 원(랜드마크 점)을 캐시된 원 스탬프로 한 번의 NumPy 인덱싱에 채움.
+    (H, W) 전체 마스크 대신 반지름 크기의 오프셋만 브로드캐스트하여 메모리 사용을 억제.
+    (ogrid로 점마다 전체 프레임 마스크를 만들면 N×H×W 불리언이 생겨 고해상도 X선에서 수백 MB가 됨)
+    create_clinical_overlay / create_landmark_overlay 공용
+    """
+    if len(centers) == 0:
+        return
+    dy, dx = _disk_stamp(int(radius))
+    h, w = arr.shape[:2]
+    xs = np.rint(centers[:, 0]).astype(np.intp)[:, None] + dx[None, :]
+    ys = np.rint(centers[:, 1]).astype(np.intp)[:, None] + dy[None, :]
+    valid = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+    arr[ys[valid], xs[valid]] = color
+
 def create_clinical_overlay(image, landmarks, clinical_metrics=None):
-    """임상용 각도/평면 오버레이"""
-    img_copy = image.copy()
+    """임상용 각도/평면 오버레이 (image: PIL 이미지 또는 RGB 배열)"""
+    color = '#C53030'
+    radius = 8
+    # 랜드마크 점: 흰 테두리(2px) + 빨간 원을 벡터화하여 일괄 래스터화
+    arr = _pil_to_np(image)
+    height, width = arr.shape[:2]
+    centers = np.asarray(list(landmarks.values()), dtype=np.float64).reshape(-1, 2)
+    _fill_disks(arr, centers, radius, (255, 255, 255))
+    _fill_disks(arr, centers, radius - 2, (197, 48, 48))
+    img_copy = _np_to_pil(arr)
     draw = ImageDraw.Draw(img_copy)
-    width, height = image.size
-    # 랜드마크
+    # 랜드마크 이름
     for name, (x, y) in landmarks.items():
-        color = '#C53030'
-        radius = 8
-        draw.ellipse([x-radius, y-radius, x+radius, y+radius],
-                     fill=color, outline='white', width=2)
         try:
             draw.text((x + radius + 5, y - radius - 5), name,
                       fill=color, stroke_width=1, stroke_fill='white')
@@ -702,81 +863,224 @@ def create_clinical_overlay(image, landmarks, clinical_metrics=None):
                       fill='#FFA726')
     return img_copy
 
+def _image_key(image):
+    """캐시 키용 이미지 지문 (이미지 로드 시 한 번만 계산해 세션에 보관, 크기/모드 포함)"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{image.mode}:{image.width}x{image.height}".encode())
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+# st.image 표시 폭 (이미지 뷰어 / 분석·시뮬레이터 오버레이)
+_VIEWER_DISPLAY_WIDTH = 480
+_OVERLAY_DISPLAY_WIDTH = 640
+
+def encode_for_display(image, width=None, quality=90):
+    """
+    st.image가 변환 없이 그대로 전송하는 형태(표시 폭 이하의 RGB JPEG)로 한 번만 인코딩.
+    st.image는 알파 없는 이미지를 JPEG로 내보내므로, PNG/WebP 바이트나 표시 폭보다 큰 이미지를 넘기면
+    호출(재실행)마다 디코딩·리사이즈·JPEG 재인코딩이 일어남
+    """
+    if width is not None and image.width > width:
+        image = image.resize((width, max(1, int(image.height * width / image.width))), Image.LANCZOS)
+    buf = BytesIO()
+    image.convert("RGB").save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+@st.cache_resource(show_spinner=False, max_entries=8, ttl=_CACHE_TTL)
+def _viewer_canvas(img_key, _image, max_h=640):
+    """
+    오버레이 캔버스용 축소본 RGB 배열 (CSS 표시 상한에 맞춰 서버에서 미리 축소)
+    리소스 캐시라 복사/PNG 디코딩 없이 같은 배열을 돌려주므로 읽기 전용으로 고정하고,
+    오버레이 함수는 _pil_to_np에서 NumPy 복사본 위에 그림.
+    원본 해상도 이미지는 파이프라인 입력/리포트 경로에서만 사용
+    """
+    # 원본 전체 복사(copy + thumbnail) 대신 resize로 축소본만 새로 만듦 (reducing_gap: 정수 축소 후 LANCZOS)
+    scale = min(1.0, max_h / _image.height, max_h * 2 / _image.width)
+    size = (max(1, round(_image.width * scale)), max(1, round(_image.height * scale)))
+    img = _image if size == _image.size else _image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+    canvas = np.array(img.convert("RGB"), dtype=np.uint8)
+    canvas.flags.writeable = False
+    return canvas
+
+@st.cache_data(show_spinner=False, max_entries=8, ttl=_CACHE_TTL)
+def _overlay_cached(img_key, landmarks_t, metrics_t, _image):
+    """임상 오버레이 표시용 JPEG 바이트 캐시"""
+    metrics = {name: {'value': value} for name, value in metrics_t} if metrics_t else None
+    # 뷰어 해상도 축소본 위에 그려 래스터화/인코딩/전송량을 줄임
+    canvas = _viewer_canvas(img_key, _image)
+    scale = canvas.shape[1] / _image.width
+    landmarks = {name: (x * scale, y * scale) for name, (x, y) in landmarks_t}
+    overlay = create_clinical_overlay(canvas, landmarks, metrics)
+    return encode_for_display(overlay, _OVERLAY_DISPLAY_WIDTH)
+
+def clinical_overlay_bytes(image, image_key, landmarks, clinical_metrics=None):
+    """탭 전환/재실행 시 동일 입력이면 캐시된 임상 오버레이 바이트를 반환"""
+    landmarks_t = tuple(sorted((name, (float(x), float(y))) for name, (x, y) in landmarks.items()))
+    metrics_t = tuple(sorted((name, float(data['value'])) for name, data in (clinical_metrics or {}).items()))
+    return _overlay_cached(image_key, landmarks_t, metrics_t, image)
+
+def overlay_thumbnail(overlay_bytes, size=(480, 320)):
+    """
+    이미 렌더링된 임상 오버레이(clinical_overlay_bytes 결과)를 썸네일 크기로 축소
+    썸네일 해상도에서 다시 그리면 점/선/글자가 고정 픽셀이라 상대적으로 커지므로, 그린 결과를 줄임
+    """
+    small = Image.open(BytesIO(overlay_bytes))
+    small.thumbnail(size, Image.LANCZOS)
+    return small
+
+def decode_uploaded_image(uploaded_file):
+    """
+    업로드 파일을 한 번만 RGB로 디코딩 (해상도는 랜드마크 좌표 기준이므로 원본 유지)
+    이후 파이프라인이 분석마다 convert("RGB") 사본을 만들지 않음
+    """
+    uploaded_file.seek(0)
+    img = Image.open(uploaded_file)
+    img.load()
+    return img if img.mode == "RGB" else img.convert("RGB")
+
+_BATCH_COLUMNS = ["파일", "분류", "신뢰도(%)", "ANB(°)", "처리시간(ms)", "상태"]
+
+def batch_analysis_rows(uploaded_files, worker, meta, anchors, timeout=None):
+    """
+    업로드 파일별 요약 행 목록 - 디코딩/분석 실패는 예외 대신 해당 행의 '상태'에 기록
+    대기 시간은 파일마다가 아니라 배치 전체에 timeout초(기본 _PIPELINE_TIMEOUT_S) 하나만 적용 (초과분은 취소)
+    """
+    timeout = _PIPELINE_TIMEOUT_S if timeout is None else timeout
+    futures = []
+    for f in uploaded_files:
+        try:
+            futures.append(worker.submit(decode_uploaded_image(f), meta=meta, anchors=anchors))
+        except Exception as e:
+            futures.append(e)
+    deadline = time.monotonic() + timeout
+    rows = []
+    for f, fut in zip(uploaded_files, futures):
+        try:
+            if isinstance(fut, Exception):
+                raise fut
+            res = fut.result(timeout=max(0.0, deadline - time.monotonic()))
+        except TimeoutError:
+            fut.cancel()
+            rows.append((f.name, None, None, None, None, f"시간 초과 ({timeout:.0f}s)"))
+            continue
+        except Exception as e:
+            rows.append((f.name, None, None, None, None, f"오류: {e}"))
+            continue
+        if res.get("success"):
+            label, _, conf = _normalize_classification_display(res["classification"])
+            anb = res.get("clinical_metrics", {}).get("ANB", {}).get("value")
+            rows.append((f.name, label, round(conf * 100, 1), anb, res["performance"]["total_time_ms"], "완료"))
+        else:
+            rows.append((f.name, None, None, None, None, res.get("error", {}).get("message", "실패")))
+    return rows
+
+def render_batch_analysis(uploaded_files, demo_mode, meta, anchors):
+    """여러 업로드 이미지를 공유 워커로 일괄 분석하고 요약표를 표시"""
+    file_ids = tuple(f.file_id for f in uploaded_files)
+    if st.button(f"📦 전체 일괄 분석 ({len(uploaded_files)}건)", use_container_width=True):
+        with st.spinner("일괄 분석 중입니다..."):
+            # 파이프라인 접근은 공유 워커 스레드로만 - 한꺼번에 넣은 요청은 워커가 run_batch로 묶어 처리
+            rows = batch_analysis_rows(uploaded_files, get_pipeline_worker(demo_mode, _PIPELINE_SEED), meta, anchors)
+        # 결과 전체 대신 요약표만 세션에 보관 (업로드 목록이 바뀌면 표시하지 않음)
+        st.session_state.batch_results = (file_ids, pd.DataFrame(rows, columns=_BATCH_COLUMNS))
+        add_audit_log("일괄 분석", f"{len(uploaded_files)}건")
+    batch = st.session_state.batch_results
+    if batch is not None and batch[0] == file_ids:
+        st.dataframe(batch[1], hide_index=True, use_container_width=True)
+
+def set_input_image(image, image_key=None):
+    """입력 이미지 교체 - 이전 이미지 기준의 분석 결과/오버레이는 함께 무효화 (키를 알면 재해시 생략)"""
+    st.session_state.input_image = image
+    st.session_state.input_image_key = image_key or _image_key(image)
+    # 뷰어 표시용 바이트는 이미지 교체 시 한 번만 인코딩해 보관 (재실행마다 캐시 조회/인코딩 생략)
+    st.session_state.input_image_bytes = encode_for_display(image, _VIEWER_DISPLAY_WIDTH)
+    st.session_state.analysis_results = None
+    st.session_state.full_overlay = None
+    st.session_state.overlay_thumbnail = None
+    st.session_state.overlay_thumbnail_jpeg = None
+    st.session_state.report_thumb_uri = None
+
+# 상태 배지 HTML 템플릿 (임포트 시 한 번만 생성, 호출마다 값만 치환)
+_BADGE_TMPL = string.Template("""
+            <div class="clinical-card">
+                <div style="text-align: center;">
+                    <h4 style="margin: 0; color: $color; font-weight: bold;">$icon $name</h4>
+                    <p style="margin: 8px 0; font-size: 24px; font-weight: bold; color: $color;">$value°</p>
+                    <p style="margin: 0; font-size: 12px; color: #666;">정상: $low-$high°</p>
+                    <span class="$badge_class">$status</span>
+                </div>
+            </div>""")
+
 def render_clinical_status_badges(clinical_metrics):
-    """건양대 테마 정상범위 배지 시스템 (향상됨)"""
+    """건양대 테마 정상범위 배지 시스템 (4열 그리드 한 요소로 전송)"""
     st.markdown("### 📊 임상 지표 상태")
-    normal_ranges = {'SNA': (80, 84), 'SNB': (78, 82), 'ANB': (0, 4), 'FMA': (25, 30)}
-    colors = {'normal': '#2D5530', 'warning': '#FFA726', 'error': '#C53030'}
-    cols = st.columns(4)
-    metric_names = ['SNA', 'SNB', 'ANB', 'FMA']
-    for i, metric_name in enumerate(metric_names):
-        if metric_name in clinical_metrics:
-            metric_data = clinical_metrics[metric_name]
-            value = float(metric_data['value'])
-            normal_min, normal_max = normal_ranges[metric_name]
-            if normal_min <= value <= normal_max:
-                status = "정상"; badge_class = "status-badge-normal"; color = colors['normal']; icon = "✅"
-            elif abs(value - normal_min) <= 2 or abs(value - normal_max) <= 2:
-                status = "경계"; badge_class = "status-badge-warning"; color = colors['warning']; icon = "⚠️"
-            else:
-                status = "이탈"; badge_class = "status-badge-error"; color = colors['error']; icon = "🚨"
-            with cols[i]:
-                st.markdown(f"""
-                <div class="clinical-card">
-                    <div style="text-align: center;">
-                        <h4 style="margin: 0; color: {color}; font-weight: bold;">{icon} {metric_name}</h4>
-                        <p style="margin: 8px 0; font-size: 24px; font-weight: bold; color: {color};">{value:.1f}°</p>
-                        <p style="margin: 0; font-size: 12px; color: #666;">정상: {normal_min}-{normal_max}°</p>
-                        <span class="{badge_class}">{status}</span>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+    html_parts = ['<div style="display: grid; grid-template-columns: repeat(4, 1fr); column-gap: 1rem;">']
+    for metric_name in ('SNA', 'SNB', 'ANB', 'FMA'):
+        if metric_name not in clinical_metrics:
+            html_parts.append("<div></div>")  # 열 위치 유지
+            continue
+        value = float(clinical_metrics[metric_name]['value'])
+        normal_min, normal_max = NORMAL_RANGES[metric_name]
+        status, badge_class, color, icon = _classify_metric(metric_name, value)
+        html_parts.append(_BADGE_TMPL.substitute(
+            color=color, icon=icon, name=metric_name, value=f"{value:.1f}",
+            low=normal_min, high=normal_max, badge_class=badge_class, status=status))
+    html_parts.append("</div>")
+    st.markdown("".join(html_parts), unsafe_allow_html=True)
+
+_WHATIF_HEADER_HTML = """
+<div class="whatif-simulator">
+    <div class="whatif-header">
+        <h3 style="margin: 0;">🎛️ What-if 시뮬레이션</h3>
+        <p style="margin: 0.5rem 0 0 0;"><em>임상 지표를 조정하면 분류가 어떻게 바뀔까요?</em></p>
+    </div>
+</div>
+"""
 
 def render_whatif_simulator(analysis_result):
-    """건양대 테마 What-if 시뮬레이터 (이미지 크기 축소 적용)"""
-    st.markdown("""
-        <div class="whatif-simulator">
-            <div class="whatif-header">
-                <h3 style="margin: 0;">🎛️ What-if 시뮬레이션</h3>
-                <p style="margin: 0.5rem 0 0 0;"><em>임상 지표를 조정하면 분류가 어떻게 바뀔까요?</em></p>
-            </div>
-        </div>
-    """, unsafe_allow_html=True)
+    """
+    건양대 테마 What-if 시뮬레이터 (이미지 크기 축소 적용)
+    헤더/원본 분류 카드는 정적이므로 여기서 한 번만 그리고,
+    슬라이더 폼과 결과 비교는 _whatif_fragment에서 처리
+    """
+    st.markdown(_WHATIF_HEADER_HTML, unsafe_allow_html=True)
 
     original_metrics = analysis_result['clinical_metrics']
     original_classification = analysis_result['classification']
     orig_label, orig_class, orig_conf = _normalize_classification_display(original_classification)
 
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown(f"""
-        <div style="background: #2D5530; color: white; padding: 1rem; border-radius: 12px; text-align: center;">
-            <strong>원본 분류: {orig_label}</strong>
-        </div>
-        """, unsafe_allow_html=True)
-    with col2:
-        st.markdown(f"""
-        <div style="background: #5B9BD5; color: white; padding: 1rem; border-radius: 12px; text-align: center;">
-            <strong>원본 신뢰도: {orig_conf*100:.1f}%</strong>
-        </div>
-        """, unsafe_allow_html=True)
+    # 원본 카드는 네이티브 위젯으로 (HTML 문자열 대신 값만 전송되어 rerun diff가 가벼움)
+    with st.container(border=True):
+        col1, col2 = st.columns(2)
+        col1.metric("원본 분류", orig_label)
+        col2.metric("원본 신뢰도", f"{orig_conf*100:.1f}%")
+
+    return _whatif_fragment(original_metrics, orig_class, orig_conf)
 
+@st.fragment
+def _whatif_fragment(original_metrics, orig_class, orig_conf):
+    """
+    What-if 슬라이더 + 결과 비교 영역
+    fragment + form: 슬라이더 값은 '적용' 시 한 번에 반영되고, 이 영역만 재실행됨
+    """
     st.markdown("#### 🎚️ 임상 지표 조정")
-    slider_cols = st.columns(2)
-    with slider_cols[0]:
-        original_anb = float(original_metrics['ANB']['value'])
-        adjusted_anb = st.slider("ANB 각도 (°)", min_value=-5.0, max_value=15.0, value=float(original_anb), step=0.5,
-                                 help="ANB = SNA - SNB (상하악 관계의 핵심 지표)")
-        original_fma = float(original_metrics['FMA']['value'])
-        adjusted_fma = st.slider("FMA 각도 (°)", min_value=15.0, max_value=40.0, value=float(original_fma), step=0.5,
-                                 help="하악 경사각 (수직성장 vs 수평성장)")
-    with slider_cols[1]:
-        original_sna = float(original_metrics['SNA']['value'])
-        adjusted_sna = st.slider("SNA 각도 (°)", min_value=75.0, max_value=90.0, value=float(original_sna), step=0.5,
-                                 help="상악골 전후방 위치")
-        original_snb = float(original_metrics['SNB']['value'])
-        adjusted_snb = st.slider("SNB 각도 (°)", min_value=70.0, max_value=85.0, value=float(original_snb), step=0.5,
-                                 help="하악골 전후방 위치")
+    with st.form("whatif"):
+        slider_cols = st.columns(2)
+        with slider_cols[0]:
+            original_anb = float(original_metrics['ANB']['value'])
+            adjusted_anb = st.slider("ANB 각도 (°)", min_value=-5.0, max_value=15.0, value=float(original_anb), step=0.5,
+                                     help="ANB = SNA - SNB (상하악 관계의 핵심 지표)")
+            original_fma = float(original_metrics['FMA']['value'])
+            adjusted_fma = st.slider("FMA 각도 (°)", min_value=15.0, max_value=40.0, value=float(original_fma), step=0.5,
+                                     help="하악 경사각 (수직성장 vs 수평성장)")
+        with slider_cols[1]:
+            original_sna = float(original_metrics['SNA']['value'])
+            adjusted_sna = st.slider("SNA 각도 (°)", min_value=75.0, max_value=90.0, value=float(original_sna), step=0.5,
+                                     help="상악골 전후방 위치")
+            original_snb = float(original_metrics['SNB']['value'])
+            adjusted_snb = st.slider("SNB 각도 (°)", min_value=70.0, max_value=85.0, value=float(original_snb), step=0.5,
+                                     help="하악골 전후방 위치")
+        submitted = st.form_submit_button("적용", use_container_width=True)
 
     new_classification = simulate_classification_from_anb(adjusted_anb)
 
@@ -795,6 +1099,12 @@ def render_whatif_simulator(analysis_result):
     if abs(anb_change) > 0.5:
         st.markdown("#### 💡 임상적 해석")
         interpret_anb_change_konyang(original_anb, adjusted_anb, new_classification)
+        with st.expander("ANB 민감도 곡선"):
+            st.line_chart(_anb_sensitivity_frame()["신뢰도"], height=200)
+            st.caption(f"현재 ANB {adjusted_anb:.1f}° · 경계(0°, 4°) 부근에서 신뢰도가 낮아집니다.")
+
+    if submitted:
+        add_audit_log("What-if 시뮬레이션", f"ANB 조정: {adjusted_anb:.1f}°")
 
     return {
         'adjusted_anb': adjusted_anb,
@@ -804,131 +1114,242 @@ def render_whatif_simulator(analysis_result):
         'new_classification': new_classification
     }
 
+# ANB 구간별 (분류, 기본 신뢰도, 라벨): ANB < 0 / 0 ≤ ANB ≤ 4 / ANB > 4
+_ANB_CLASSES = ((3, 0.85, 'Class III'), (1, 0.80, 'Class I'), (2, 0.82, 'Class II'))
+
 def simulate_classification_from_anb(anb_value):
-    """ANB 값으로부터 분류 시뮬레이션"""
-    if anb_value < 0:
-        predicted_class = 3; base_confidence = 0.85
-    elif anb_value <= 4:
-        predicted_class = 1; base_confidence = 0.80
-    else:
-        predicted_class = 2; base_confidence = 0.82
-    if abs(anb_value - 0) < 1 or abs(anb_value - 4) < 1:
-        base_confidence -= 0.15
-    confidence = float(np.clip(base_confidence, 0.3, 0.95))
-    return {'class': predicted_class, 'confidence': confidence,
-            'anb_category': 'Class III' if anb_value < 0 else 'Class I' if anb_value <= 4 else 'Class II'}
+    """ANB 값으로부터 분류 시뮬레이션 (스칼라 전용 - NumPy 호출 없이 순수 파이썬으로 계산)"""
+    # 구간 인덱스/경계 감점을 비교식의 합으로 계산 (배열 버전과 동일한 분기 없는 식)
+    predicted_class, confidence, category = _ANB_CLASSES[2 - (anb_value <= 4) - (anb_value < 0)]
+    confidence -= 0.15 * ((abs(anb_value) < 1) | (abs(anb_value - 4) < 1))
+    confidence = 0.3 if confidence < 0.3 else 0.95 if confidence > 0.95 else confidence
+    return {'class': predicted_class, 'confidence': float(confidence), 'anb_category': category}
+
+_ANB_CLASS_IDS = np.array([c for c, _, _ in _ANB_CLASSES], dtype=np.int8)
+_ANB_BASE_CONF = np.array([conf for _, conf, _ in _ANB_CLASSES])
+
+def simulate_classification_batch(anb_values):
+    """simulate_classification_from_anb의 배열 버전 - (분류 배열, 신뢰도 배열)을 한 번에 계산"""
+    anb = np.asarray(anb_values, dtype=np.float64)
+    idx = 2 - (anb <= 4).astype(np.intp) - (anb < 0)
+    confidence = _ANB_BASE_CONF[idx] - 0.15 * ((np.abs(anb) < 1) | (np.abs(anb - 4) < 1))
+    return _ANB_CLASS_IDS[idx], np.clip(confidence, 0.3, 0.95)
+
+@st.cache_data(show_spinner=False)
+def _anb_sensitivity_frame():
+    """What-if 슬라이더 범위(-5~15°) 전체의 ANB → 신뢰도 곡선 (입력이 고정이므로 1회 계산)"""
+    anb = np.linspace(-5.0, 15.0, 201)
+    classes, confidence = simulate_classification_batch(anb)
+    return pd.DataFrame({"ANB (°)": anb, "분류": classes, "신뢰도": confidence}).set_index("ANB (°)")
+
+# ANB 변화 해석 카드 (정적 카드는 완성 문자열, 수치가 들어가는 카드만 템플릿 치환)
+_ANB_STABLE_HTML = """
+        <div style="background: #2D5530; color: white; padding: 1.2rem; border-radius: 15px;">
+            <h4 style="margin: 0;">✅ 미미한 변화: 분류에 큰 영향 없음</h4>
+        </div>
+        """
+_ANB_CHANGE_TMPL = string.Template("""
+    <div style="background: $color; color: white; padding: 1.5rem; border-radius: 15px; box-shadow: 0 4px 12px ${color}40;">
+        <h4 style="margin-top: 0; color: white;">📈 ANB $direction ($change°)</h4>
+        <p><strong>임상적 의미:</strong> $meaning</p>
+        <p><strong>분류 경향:</strong> $tendency</p>
+        <p><strong>새 분류:</strong> Class $new_class (신뢰도 $confidence%)</p>
+    </div>
+    """)
+# 변화 방향별 (방향, 임상적 의미, 분류 경향, 색상)
+_ANB_DIRECTIONS = {
+    True: dict(direction="증가", meaning="상악 과성장 또는 하악 후퇴 양상", tendency="Class II 방향", color="#C53030"),
+    False: dict(direction="감소", meaning="상악 후퇴 또는 하악 전진 양상", tendency="Class III 방향", color="#5B9BD5"),
+}
+_ANB_BORDER_TMPL = string.Template("""
+        <div style="background: #FFA726; color: white; padding: 1rem; border-radius: 12px; margin-top: 1rem;">
+            <strong>⚠️ 경계 영역: $label</strong>
+        </div>
+        """)
+_ANB_BORDER_I_II_HTML = _ANB_BORDER_TMPL.substitute(label="Class I/II 경계 (ANB ≈ 4°)")
+_ANB_BORDER_I_III_HTML = _ANB_BORDER_TMPL.substitute(label="Class I/III 경계 (ANB ≈ 0°)")
 
 def interpret_anb_change_konyang(original_anb, new_anb, new_result):
     """건양대 테마 ANB 변화 해석"""
     change = new_anb - original_anb
     if abs(change) < 0.5:
-        st.markdown("""
-        <div style="background: #2D5530; color: white; padding: 1.2rem; border-radius: 15px;">
-            <h4 style="margin: 0;">✅ 미미한 변화: 분류에 큰 영향 없음</h4>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(_ANB_STABLE_HTML, unsafe_allow_html=True)
         return
-    if change > 0:
-        direction = "증가"; meaning = "상악 과성장 또는 하악 후퇴 양상"; tendency = "Class II 방향"; color = "#C53030"
-    else:
-        direction = "감소"; meaning = "상악 후퇴 또는 하악 전진 양상"; tendency = "Class III 방향"; color = "#5B9BD5"
-    st.markdown(f"""
-    <div style="background: {color}; color: white; padding: 1.5rem; border-radius: 15px; box-shadow: 0 4px 12px {color}40;">
-        <h4 style="margin-top: 0; color: white;">📈 ANB {direction} ({change:+.1f}°)</h4>
-        <p><strong>임상적 의미:</strong> {meaning}</p>
-        <p><strong>분류 경향:</strong> {tendency}</p>
-        <p><strong>새 분류:</strong> Class {new_result['class']} (신뢰도 {new_result['confidence']*100:.1f}%)</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_ANB_CHANGE_TMPL.substitute(
+        _ANB_DIRECTIONS[change > 0],
+        change=f"{change:+.1f}",
+        new_class=new_result['class'],
+        confidence=f"{new_result['confidence']*100:.1f}",
+    ), unsafe_allow_html=True)
     if 3.5 <= new_anb <= 4.5:
-        st.markdown("""
-        <div style="background: #FFA726; color: white; padding: 1rem; border-radius: 12px; margin-top: 1rem;">
-            <strong>⚠️ 경계 영역: Class I/II 경계 (ANB ≈ 4°)</strong>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(_ANB_BORDER_I_II_HTML, unsafe_allow_html=True)
     elif -0.5 <= new_anb <= 0.5:
-        st.markdown("""
-        <div style="background: #FFA726; color: white; padding: 1rem; border-radius: 12px; margin-top: 1rem;">
-            <strong>⚠️ 경계 영역: Class I/III 경계 (ANB ≈ 0°)</strong>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(_ANB_BORDER_I_III_HTML, unsafe_allow_html=True)
+
+# 이 파일은 Streamlit이 재실행마다 다시 실행하므로 모듈 수준 lru_cache는 매번 비워짐
+# → 폰트는 프로세스 단위 리소스 캐시에 보관
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _get_font(size: int):
+    """라벨 폰트를 크기별로 한 번만 탐색/로드 (없으면 기본 폰트)"""
+    for path in ("Arial.ttf", "/System/Library/Fonts/Arial.ttf"):
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    # Pillow 10.1+: 크기를 주면 내장 FreeType 폰트를 해당 크기로 로드 (비트맵 기본 폰트는 크기 고정)
+    return ImageFont.load_default(size)
 
-def create_landmark_overlay(image, landmarks, highlight_points=None, size_factor=0.016, show_labels=True):
-    """이미지에 랜드마크를 오버레이합니다 (건양대 색상)"""
-    img_copy = image.copy()
-    draw = ImageDraw.Draw(img_copy)
-    width, height = image.size
-    base_size = min(width, height)
-    for name, (x, y) in landmarks.items():
-        if highlight_points and name in highlight_points:
-            color = '#5B9BD5'; outline_color = '#FFFFFF'; radius = max(10, int(base_size * size_factor * 1.2)); text_color = '#5B9BD5'
-        else:
-            color = '#C53030'; outline_color = '#FFFFFF'; radius = max(8, int(base_size * size_factor)); text_color = '#C53030'
-        draw.ellipse([x-radius, y-radius, x+radius, y+radius], fill=color, outline=outline_color, width=3)
-        if show_labels:
-            font_size = max(14, int(base_size * size_factor * 1.2))
-            try:
-                from PIL import ImageFont
-                try:
-                    font = ImageFont.truetype("Arial.ttf", font_size)
-                except:
-                    try:
-                        font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", font_size)
-                    except:
-                        font = ImageFont.load_default()
-            except:
-                font = None
-            text_x, text_y = x + radius + 8, y - radius - 8
-            if font:
-                bbox = draw.textbbox((text_x, text_y), name, font=font)
-                text_width = bbox[2] - bbox[0]
-                text_height = bbox[3] - bbox[1]
-            else:
-                text_width, text_height = len(name) * 10, 14
-            bg_padding = 3
-            draw.rectangle([text_x - bg_padding, text_y - bg_padding,
-                            text_x + text_width + bg_padding, text_y + text_height + bg_padding],
-                           fill='white', outline=text_color, width=1)
-            if font:
-                draw.text((text_x, text_y), name, fill=text_color, font=font)
-            else:
-                draw.text((text_x, text_y), name, fill=text_color)
+def create_landmark_overlay(image, landmarks, highlight_points=None, size_factor=0.016, show_labels=True,
+                            base_size=None):
+    """
+    이미지에 랜드마크를 오버레이합니다 (건양대 색상)
+    점은 NumPy 버퍼에 스타일별로 일괄 래스터화하고, 라벨만 PIL로 그림 (원본 이미지/배열은 변경하지 않음)
+    base_size: 축소 캔버스에 그릴 때 원본의 min(가로, 세로). 크기/최소 픽셀 하한을 원본 기준으로 계산한 뒤
+    캔버스 비율로 줄여, 크기 옵션별 결과가 원본 해상도에서 그린 것과 같은 비율이 되도록 함
+    """
+    arr = _pil_to_np(image)
+    height, width = arr.shape[:2]
+    # 크기 관련 스칼라는 이미지/배율에만 의존하므로 한 번만 계산 (원본 기준 → 캔버스 비율 scale 적용)
+    ref = base_size or min(width, height)
+    scale = min(width, height) / ref
+    unit = ref * size_factor
+    unit_hi = int(unit * 1.2)
+
+    def px(v):
+        return max(1, round(v * scale))
+
+    # (채움색 RGB, 반지름, 글자색) - 일반/강조 스타일을 루프 밖에서 한 번만 계산, 테두리는 흰색 3px(원본 기준)
+    normal_style = ((197, 48, 48), px(max(8, int(unit))), '#C53030')
+    highlight_style = ((91, 155, 213), px(max(10, unit_hi)), '#5B9BD5')
+    outline_width = min(px(3), normal_style[1] - 1)
+    hp = set(highlight_points) if highlight_points else frozenset()
+    names = list(landmarks)
+    xy = np.array(list(landmarks.values()), dtype=np.float64).reshape(-1, 2)
+    is_hl = np.fromiter((name in hp for name in names), dtype=bool, count=len(names))
+    # 강조 점이 일반 점 위에 오도록 일반 → 강조 순서로 채움
+    for mask, (fill, radius, _) in ((~is_hl, normal_style), (is_hl, highlight_style)):
+        _fill_disks(arr, xy[mask], radius, (255, 255, 255))
+        _fill_disks(arr, xy[mask], radius - outline_width, fill)
+    img_copy = _np_to_pil(arr)
+    # 라벨을 그리지 않으면 폰트 탐색/글자 크기 계산을 모두 생략
+    if show_labels:
+        font = _get_font(px(max(14, unit_hi)))
+        # 라벨 높이는 폰트당 한 번만 측정 (load_default()가 비트맵 폰트를 줄 때는 getmetrics()가 없으므로 getbbox 사용)
+        text_height = font.getbbox("Ag")[3]
+        bg_padding = px(3)
+        text_gap = px(8)
+        # 라벨 박스를 NumPy로 한 번에 계산하고, 루프에서는 PIL 호출만 수행 (모든 점 위에 그려짐)
+        radii = np.where(is_hl, highlight_style[1], normal_style[1])
+        text_x = xy[:, 0] + radii + text_gap
+        text_y = xy[:, 1] - radii - text_gap
+        # 폭은 글자 진행 폭(getlength)만 필요하므로 라벨별 textbbox 측정 없이 계산
+        text_w = np.fromiter((font.getlength(name) for name in names), dtype=np.float64, count=len(names))
+        boxes = np.stack([text_x - bg_padding, text_y - bg_padding,
+                          text_x + text_w + bg_padding, text_y + text_height + bg_padding], axis=1).tolist()
+        # 라벨 배경/글자는 투명 레이어 하나에 모아 그린 뒤 한 번만 합성 (RGB 원본에 라벨별로 덧그리지 않음)
+        label_layer = Image.new("RGBA", img_copy.size, (0, 0, 0, 0))
+        label_draw = ImageDraw.Draw(label_layer)
+        for i, name in enumerate(names):
+            text_color = highlight_style[2] if is_hl[i] else normal_style[2]
+            label_draw.rectangle(boxes[i], fill='white', outline=text_color, width=1)
+            label_draw.text((float(text_x[i]), float(text_y[i])), name, fill=text_color, font=font)
+        img_copy = Image.alpha_composite(img_copy.convert("RGBA"), label_layer).convert("RGB")
     return img_copy
 
+@st.cache_data(show_spinner=False, max_entries=8, ttl=_CACHE_TTL)
+def _landmark_overlay_cached(img_key, landmarks_t, highlight_t, size_factor, show_labels, _image):
+    """랜드마크 오버레이 표시용 JPEG 바이트 캐시"""
+    # 임상 오버레이와 같이 뷰어 해상도 축소본 위에 그려 래스터화/인코딩/전송량을 줄임
+    canvas = _viewer_canvas(img_key, _image)
+    scale = canvas.shape[1] / _image.width
+    landmarks = {name: (x * scale, y * scale) for name, (x, y) in landmarks_t}
+    overlay = create_landmark_overlay(canvas, landmarks, highlight_t, size_factor, show_labels,
+                                      base_size=min(_image.size))
+    return encode_for_display(overlay, _OVERLAY_DISPLAY_WIDTH)
+
+@st.cache_data(show_spinner=False, max_entries=8, ttl=_CACHE_TTL)
+def landmarks_to_df(landmarks_t):
+    """랜드마크 좌표표 (정렬된 (이름, (x, y)) 튜플로 키잉 - 재실행마다 행을 다시 만들지 않음)"""
+    # 열 타입을 명시해 Arrow 변환 시 스키마 추론을 생략 (표시 자릿수는 column_config에서 지정)
+    n = len(landmarks_t)
+    return pd.DataFrame({
+        "랜드마크": pd.Categorical([name for name, _ in landmarks_t]),
+        "X": np.fromiter((x for _, (x, _) in landmarks_t), dtype=np.float32, count=n),
+        "Y": np.fromiter((y for _, (_, y) in landmarks_t), dtype=np.float32, count=n),
+    })
+
+_LANDMARK_COLUMN_CONFIG = {
+    "X": st.column_config.NumberColumn("X", format="%.1f"),
+    "Y": st.column_config.NumberColumn("Y", format="%.1f"),
+}
+
+# '랜드마크 크기' 선택지 → size_factor
+_LANDMARK_SIZE_FACTORS = {"작게": 0.008, "보통": 0.012, "크게": 0.016, "매우 크게": 0.020}
+_DEFAULT_LANDMARK_SIZE = "크게"
+_VIEW_SETTING_KEYS = ("landmark_size", "show_labels", "show_clinical_overlay")
+
+@st.fragment
+def _landmark_view_fragment(results):
+    """
+    랜드마크 시각화 설정 + 오버레이 영역
+    fragment: 크기/라벨/오버레이 설정을 바꾸면 이 영역만 재실행됨 (사이드바·지표 카드는 그대로)
+    """
+    st.markdown("### 📍 랜드마크 시각화")
+    opt_cols = st.columns(3)
+    opt_cols[0].selectbox("랜드마크 크기", list(_LANDMARK_SIZE_FACTORS), key="landmark_size")
+    opt_cols[1].checkbox("랜드마크 이름 표시", key="show_labels")
+    opt_cols[2].checkbox("임상 오버레이", key="show_clinical_overlay", help="SN선, FH평면, 각도 표시")
+    if st.session_state.show_clinical_overlay:
+        st.image(st.session_state.full_overlay, caption="임상 오버레이", width=_OVERLAY_DISPLAY_WIDTH)
+    else:
+        # 크기/라벨 설정별 랜드마크 오버레이 (처음 요청될 때 렌더링 후 캐시)
+        st.image(landmark_overlay_bytes(
+            st.session_state.input_image, st.session_state.input_image_key,
+            results["landmarks"]["coordinates"],
+            size_factor=_LANDMARK_SIZE_FACTORS[st.session_state.landmark_size],
+            show_labels=st.session_state.show_labels
+        ), caption="랜드마크 오버레이", width=_OVERLAY_DISPLAY_WIDTH)
+
+def landmark_overlay_bytes(image, image_key, landmarks, highlight_points=None, size_factor=0.016, show_labels=True):
+    """위젯 조작 등으로 재실행되어도 입력이 같으면 캐시된 랜드마크 오버레이 바이트를 반환"""
+    landmarks_t = tuple(sorted((name, (float(x), float(y))) for name, (x, y) in landmarks.items()))
+    highlight_t = tuple(sorted(highlight_points)) if highlight_points else ()
+    return _landmark_overlay_cached(image_key, landmarks_t, highlight_t, float(size_factor), bool(show_labels), image)
+
+# 지표 상태별 (아이콘, 배지 클래스, 색상)
+_METRIC_STATUS_STYLE = {
+    "normal": ("✅", "status-normal", "#2D5530"),
+    "high": ("⬆️", "status-high", "#C53030"),
+}
+_METRIC_STATUS_STYLE_LOW = ("⬇️", "status-low", "#5B9BD5")
+
+# 지표 카드 HTML 템플릿 (임포트 시 한 번만 생성, 호출마다 값만 치환)
+_METRIC_CARD_TMPL = string.Template("""
+            <div class="clinical-card">
+                <h4 style="color: $color; margin: 0;">$icon $name</h4>
+                <p style="margin: 0.5rem 0;"><span class="$status_class" style="font-size: 1.3em; color: $color;">$value°</span></p>
+                <p style="margin: 0; font-size: 0.9em; color: #666;">정상 범위: $low-$high°</p>
+                <p style="margin: 0.5rem 0 0 0; font-size: 0.85em; color: #666;">$significance</p>
+            </div>""")
+
 def display_clinical_metrics(metrics):
-    """건양대 테마 임상 지표 표시"""
+    """건양대 테마 임상 지표 표시 (전체 카드를 2열 그리드 한 요소로 전송)"""
     st.markdown("### 📊 임상 지표")
-    cols = st.columns(2)
-    for i, (metric_name, data) in enumerate(metrics.items()):
-        col = cols[i % 2]
-        with col:
-            status = data["status"]
-            if status == "normal":
-                icon = "✅"; status_class = "status-normal"; bg_color = "#2D5530"
-            elif status == "high":
-                icon = "⬆️"; status_class = "status-high"; bg_color = "#C53030"
-            else:
-                icon = "⬇️"; status_class = "status-low"; bg_color = "#5B9BD5"
-            st.markdown(f"""
-                <div class="clinical-card">
-                    <h4 style="color: {bg_color}; margin: 0;">{icon} {metric_name}</h4>
-                    <p style="margin: 0.5rem 0;"><span class="{status_class}" style="font-size: 1.3em; color: {bg_color};">{data['value']:.1f}°</span></p>
-                    <p style="margin: 0; font-size: 0.9em; color: #666;">정상 범위: {data['normal_range'][0]}-{data['normal_range'][1]}°</p>
-                    <p style="margin: 0.5rem 0 0 0; font-size: 0.85em; color: #666;">{data.get('clinical_significance', '')}</p>
-                </div>
-            """, unsafe_allow_html=True)
+    html_parts = ['<div style="display: grid; grid-template-columns: 1fr 1fr; column-gap: 1rem;">']
+    for metric_name, data in metrics.items():
+        icon, status_class, bg_color = _METRIC_STATUS_STYLE.get(data["status"], _METRIC_STATUS_STYLE_LOW)
+        html_parts.append(_METRIC_CARD_TMPL.substitute(
+            color=bg_color, icon=icon, name=metric_name, status_class=status_class,
+            value=f"{data['value']:.1f}", low=data['normal_range'][0], high=data['normal_range'][1],
+            significance=data.get('clinical_significance', '')))
+    html_parts.append("</div>")
+    st.markdown("".join(html_parts), unsafe_allow_html=True)
 
 def display_classification_result(classification):
     """건양대 테마 분류 결과 표시"""
     label, _, confidence = _normalize_classification_display(classification)
     anb_value = float(classification.get("anb_value", 0.0))
-    class_info = {
-        "Class I": {"color": "#2D5530", "desc": "골격적으로 정상"},
-        "Class II": {"color": "#C53030", "desc": "골격적으로 상악 과성장"},
-        "Class III": {"color": "#5B9BD5", "desc": "골격적으로 하악 과성장"}
-    }
-    color = class_info.get(label, {}).get("color", "#2D5530")
-    description = class_info.get(label, {}).get("desc", "")
+    color, description = _CLASS_INFO.get(label, _CLASS_INFO_DEFAULT)
 
     st.markdown(f"""
         <div class="clinical-card" style="text-align: center; border: 4px solid {color};">
@@ -941,18 +1362,32 @@ def display_classification_result(classification):
     """, unsafe_allow_html=True)
 
     st.markdown("#### 분류 확률")
-    probs = classification.get("probabilities", {})
-    # 숫자/라벨 키 혼용 방지
-    label_map = {1: "Class I", 2: "Class II", 3: "Class III"}
-    for k, v in probs.items():
-        name = label_map.get(k, str(k))
-        st.progress(float(v), text=f"{name}: {float(v)*100:.1f}%")
+    # 분석 완료 시 미리 만든 표시용 리스트 사용
+    probs_display = classification.get("probabilities_display")
+    if probs_display is None:
+        probs_display = _probabilities_display(classification)
+    # 확률 막대를 한 요소로 전송 (막대 색상은 분류 테마 색상)
+    st.markdown("".join(
+        f"""<div style="margin: 6px 0;">
+            <div style="font-size: 0.9em; margin-bottom: 2px;">{name}: {prob*100:.1f}%</div>
+            <div style="background: #e2e8f0; border-radius: 6px; height: 10px;">
+                <div style="width: {min(max(prob, 0.0), 1.0)*100:.1f}%; background: {_CLASS_INFO.get(name, _CLASS_INFO_DEFAULT)[0]}; border-radius: 6px; height: 10px;"></div>
+            </div>
+        </div>"""
+        for name, prob in probs_display
+    ), unsafe_allow_html=True)
 
-def load_demo_image():
-    """대표 도면 이미지를 로드합니다."""
+@st.cache_data(show_spinner=False, ttl=_CACHE_TTL)
+def _demo_image_data():
+    """
+    대표 도면의 RGB 픽셀 버퍼/크기/캐시 키 (최초 1회만 디코딩·변환·해시)
+    PIL 객체 대신 원시 바이트를 캐시해 호출마다의 역직렬화를 단순 버퍼 복원으로 줄임
+    """
     demo_path = os.path.join(project_root, "data/sample_images/demo_xray.jpg")
     if os.path.exists(demo_path):
-        return Image.open(demo_path)
+        # 파일 핸들이 남지 않도록 디코딩 후 바로 닫음
+        with Image.open(demo_path) as img:
+            img = img.convert("RGB")
     else:
         img = Image.new('RGB', (800, 600), color='#F8F9FA')
         draw = ImageDraw.Draw(img)
@@ -960,12 +1395,19 @@ def load_demo_image():
         cx, cy = 400, 300
         draw.text((cx, cy-10), "Konyang Medical Center", fill='white', anchor='mm')
         draw.text((cx, cy+20), "Demo Cephalometric Image", fill='white', anchor='mm')
-        return img
+    return img.tobytes(), img.size, _image_key(img)
+
+def load_demo_image():
+    """대표 도면 이미지와 캐시 키를 반환 (RGB 변환/해시는 캐시에서 재사용)"""
+    data, size, key = _demo_image_data()
+    return Image.frombytes("RGB", size, data), key
 
 # --------- 파이프라인 지연 임포트 + 캐시 ----------
-@st.cache_resource(show_spinner=False)
-def get_pipeline(demo_mode: bool):
-    """클라우드 환경에서의 안정적 임포트/초기화"""
+_PIPELINE_SEED = 42
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_pipeline(demo_mode: bool, seed: int = _PIPELINE_SEED):
+    """클라우드 환경에서의 안정적 임포트/초기화 ((demo_mode, seed)별로 모든 세션이 공유)"""
     try:
         from src.core.integration_pipeline import CephalometricPipeline
     except Exception as e:
@@ -974,9 +1416,103 @@ def get_pipeline(demo_mode: bool):
             "requirements/runtime 호환성 또는 경로를 확인하세요."
         ) from e
     try:
-        return CephalometricPipeline(demo_mode=demo_mode, seed=42)
+        return CephalometricPipeline(demo_mode=demo_mode, seed=seed)
     except Exception as e:
         raise RuntimeError("AI 파이프라인 초기화 실패.") from e
+
+_PIPELINE_TIMEOUT_S = 60
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_pipeline_worker(demo_mode: bool, seed: int = _PIPELINE_SEED):
+    """세션 간 공유 분석 워커 - 동시 요청을 큐에 모아 run_batch로 처리"""
+    from src.core.integration_pipeline import PipelineWorker
+    return PipelineWorker(get_pipeline(demo_mode, seed))
+
+class _AnalysisFailed(Exception):
+    """파이프라인이 오류 결과를 돌려준 경우 - 예외는 캐시되지 않으므로 실패 결과는 다음 클릭에 재시도됨"""
+    def __init__(self, result):
+        super().__init__(result["error"]["message"])
+        self.result = result
+
+@st.cache_data(show_spinner=False, max_entries=16, ttl=_CACHE_TTL)
+def _analyze_cached(img_key, meta_t, anchors_t, demo_mode, seed, _image):
+    """(이미지 키, 환자 정보, 기준점, 모드) 단위 분석 결과 캐시 - 같은 입력으로 다시 누르면 파이프라인 생략"""
+    result = get_pipeline_worker(demo_mode, seed).submit(
+        _image, meta=dict(meta_t), anchors=dict(anchors_t) if anchors_t else None
+    ).result(timeout=_PIPELINE_TIMEOUT_S)
+    if "error" in result:
+        raise _AnalysisFailed(result)
+    return result
+
+def run_analysis(image, image_key, meta, anchors, demo_mode, seed=_PIPELINE_SEED):
+    """분석 실행 (캐시 적중 시 이전 결과의 사본을 즉시 반환, 실패 시 오류 결과를 그대로 반환)"""
+    meta_t = tuple(sorted(meta.items()))
+    anchors_t = tuple(sorted(anchors.items())) if anchors else None
+    try:
+        return _analyze_cached(image_key, meta_t, anchors_t, demo_mode, seed, image)
+    except _AnalysisFailed as e:
+        return e.result
+
+def _clear_caches():
+    """개발용: 데이터/리소스 캐시 전체 삭제 (버튼 콜백)"""
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    st.session_state.pipeline_key = None
+    add_audit_log("캐시 초기화", "데이터/리소스 캐시 삭제")
+
+# --------- 정적 안내/푸터 마크업 (리런마다 재구성하지 않도록 모듈 상수화) ----------
+_SYSTEM_SPEC_MD = """
+**📋 시스템 사양**
+- AI 모델: U-Net + ResNet
+- 처리 속도: ~18ms
+- 정확도: 94.7%
+"""
+
+_ANALYSIS_ITEMS_MD = """
+**🎯 분석 항목**
+- 19개 랜드마크 검출
+- 임상 지표 계산 (SNA, SNB, ANB, FMA)
+- 부정교합 분류 (Class I/II/III)
+"""
+
+# 시스템 리소스(데모용 고정값) 막대 3개를 한 요소로 전송
+_SYSTEM_RESOURCES_HTML = "<p><strong>📊 시스템 리소스</strong></p>" + "".join(
+    f"""<div style="margin-bottom: 0.6rem;">
+        <div style="font-size: 0.9em; margin-bottom: 4px;">{name}: {pct}%</div>
+        <div style="background: #e2e8f0; border-radius: 4px; height: 8px;">
+            <div style="width: {pct}%; background: #2D5530; border-radius: 4px; height: 8px;"></div>
+        </div>
+    </div>"""
+    for name, pct in (("CPU", 30), ("Memory", 50), ("GPU", 20))
+)
+
+# 이전 검사 이력 (정적 표 - 리런마다 행 dict에서 다시 만들지 않도록 한 번만 구성)
+_HISTORY_DF = pd.DataFrame({
+    "날짜": ["2025-01-15", "2024-12-20", "2024-11-15", "2024-10-08"],
+    "시간": ["14:35", "10:22", "16:45", "09:15"],
+    "분류": pd.Categorical(["Class II", "Class I", "Class II", "Class I"]),
+    "신뢰도": ["87.3%", "91.2%", "85.1%", "89.7%"],
+    "상태": ["완료"] * 4,
+})
+
+_FOOTER_HTML = """
+        <div style="text-align: center; color: #666; padding: 1.5rem; background: #f8fafc; border-radius: 8px;">
+            <div style="display: flex; justify-content: center; align-items: center; gap: 2rem; margin-bottom: 1rem;">
+                <div>🏥 <strong style="color: #2D5530;">건양대학교의료원</strong></div>
+                <div>📱 Cephalometric AI EMR v2.1.0</div>
+                <div>🔒 보안등급: 높음</div>
+            </div>
+            <div style="display: flex; justify-content: center; align-items: center; gap: 1rem; font-size: 0.9em;">
+                <a href="#" style="color: #2D5530;">시스템 가이드</a> | 
+                <a href="#" style="color: #7FB069;">기술지원</a> | 
+                <span style="color: #5B9BD5;">빌드: KY-EMR-240115</span>
+            </div>
+            <div style="margin-top: 1rem; font-size: 0.8em;">
+                <p><strong style="color: #C53030;">⚠️ 의료기기 소프트웨어:</strong> 이 시스템은 건양대학교 의료원 전용 AI 솔루션입니다.</p>
+                <p><strong style="color: #C53030;">⚠️ 임상 책임:</strong> 모든 AI 결과는 반드시 전문의 검토 후 최종 판단하시기 바랍니다.</p>
+            </div>
+        </div>
+    """
 # ---------------------------------------------------
 
 def main():
@@ -997,12 +1533,18 @@ def main():
         st.markdown("### ⚙️ 시스템 설정")
         demo_mode = st.toggle("데모 모드", value=True, help="오프라인 시뮬레이션 모드")
         st.session_state.demo_mode = demo_mode
-
-        # 파이프라인 초기화 (지연 임포트 + 캐시)
-        if st.session_state.pipeline is None:
+        if st.session_state.dev_mode:
+            st.button("🧹 캐시 초기화", on_click=_clear_caches, use_container_width=True,
+                      help="개발용: 데이터/리소스 캐시 전체 삭제")
+
+        # 파이프라인 초기화 (지연 임포트 + 프로세스 단위 캐시, 세션 상태에는 저장하지 않음)
+        # 현재 demo_mode로 이미 초기화했다면 재실행마다 다시 확인하지 않음
+        pipeline_key = ("pipeline", demo_mode, _PIPELINE_SEED)
+        if st.session_state.pipeline_key != pipeline_key:
             with st.spinner("파이프라인 초기화 중..."):
                 try:
-                    st.session_state.pipeline = get_pipeline(demo_mode)
+                    get_pipeline(demo_mode, _PIPELINE_SEED)
+                    st.session_state.pipeline_key = pipeline_key
                     st.success("✅ 초기화 완료")
                     add_audit_log("시스템 초기화", "AI 파이프라인 로드 완료")
                 except Exception as e:
@@ -1010,27 +1552,28 @@ def main():
                     st.exception(e)
                     st.stop()
 
-        st.markdown("### 🎨 시각화 설정")
-        landmark_size = st.selectbox("랜드마크 크기", ["작게", "보통", "크게", "매우 크게"], index=2)
-        show_labels = st.checkbox("랜드마크 이름 표시", value=True)
-        show_clinical_overlay = st.checkbox("임상 오버레이", value=True, help="SN선, FH평면, 각도 표시")
-        size_mapping = {"작게": 0.008, "보통": 0.012, "크게": 0.016, "매우 크게": 0.020}
-
+        # 환자 정보/기준점 입력은 form으로 묶어 '적용' 시에만 재실행
+        # (form 안 위젯은 제출 전까지 이전 제출값을 반환하므로 meta/anchors도 제출 시에만 바뀜)
         st.markdown("### 👤 환자 정보")
-        patient_age = st.number_input("나이", min_value=1, max_value=99, value=25)
-        patient_sex = st.selectbox("성별", ["F", "M", "U"], index=0)
-        patient_id = st.text_input("환자 ID", value="KY-2024-001")
+        with st.form("patient_form", border=False):
+            patient_age = st.number_input("나이", min_value=1, max_value=99, value=25)
+            patient_sex = st.selectbox("성별", ["F", "M", "U"], index=0)
+            patient_id = st.text_input("환자 ID", value="KY-2024-001")
+            st.form_submit_button("적용", use_container_width=True)
         meta = {"age": patient_age, "sex": patient_sex, "patient_id": patient_id}
 
         st.markdown("### 🔧 고급 설정")
+        # 체크박스는 입력란 표시 여부를 바로 바꿔야 하므로 form 밖에 둠
         use_anchors = st.checkbox("FH 기준선 수동 보정", help="Or, Po 두 점을 수동으로 지정하여 Frankfort Horizontal plane 보정")
         anchors = None
         if use_anchors:
             st.info("Or(Orbitale), Po(Porion) 좌표를 입력하세요")
-            or_x = st.number_input("Or X", value=400, min_value=0, max_value=2000)
-            or_y = st.number_input("Or Y", value=200, min_value=0, max_value=2000)
-            po_x = st.number_input("Po X", value=300, min_value=0, max_value=2000)
-            po_y = st.number_input("Po Y", value=210, min_value=0, max_value=2000)
+            with st.form("anchor_form", border=False):
+                or_x = st.number_input("Or X", value=400, min_value=0, max_value=2000)
+                or_y = st.number_input("Or Y", value=200, min_value=0, max_value=2000)
+                po_x = st.number_input("Po X", value=300, min_value=0, max_value=2000)
+                po_y = st.number_input("Po Y", value=210, min_value=0, max_value=2000)
+                st.form_submit_button("적용", use_container_width=True)
             anchors = {"Or": (float(or_x), float(or_y)), "Po": (float(po_x), float(po_y))}
 
     with content_col:
@@ -1043,55 +1586,82 @@ def main():
             with col_button:
                 if input_method == "대표 도면":
                     if st.button("🏥 로드", type="primary", use_container_width=True):
-                        selected_image = load_demo_image()
-                        st.session_state.input_image = selected_image
+                        selected_image, image_key = load_demo_image()
+                        set_input_image(selected_image, image_key)
                         add_audit_log("이미지 로드", "건양대 대표 도면")
                         st.rerun()
 
             if input_method == "파일 업로드":
-                uploaded_file = st.file_uploader("X-ray 이미지 업로드", type=["jpg", "jpeg", "png"],
-                                                 help="측면두부규격방사선사진을 업로드하세요")
-                if uploaded_file is not None:
-                    selected_image = Image.open(uploaded_file)
-                    st.session_state.input_image = selected_image
+                uploaded_files = st.file_uploader("X-ray 이미지 업로드", type=["jpg", "jpeg", "png"],
+                                                  accept_multiple_files=True,
+                                                  help="측면두부규격방사선사진을 업로드하세요 (여러 장 선택 시 일괄 분석 가능)")
+                uploaded_file = None
+                if len(uploaded_files) > 1:
+                    selected = st.selectbox("표시할 이미지", range(len(uploaded_files)),
+                                            format_func=lambda i: uploaded_files[i].name)
+                    uploaded_file = uploaded_files[selected]
+                elif uploaded_files:
+                    uploaded_file = uploaded_files[0]
+                # 업로더는 재실행마다 같은 파일을 돌려주므로 새 파일일 때만 교체
+                if uploaded_file is not None and uploaded_file.file_id != st.session_state.uploaded_file_id:
+                    st.session_state.uploaded_file_id = uploaded_file.file_id
+                    set_input_image(decode_uploaded_image(uploaded_file))
                     add_audit_log("이미지 업로드", f"파일: {uploaded_file.name}")
                     st.rerun()
+                if len(uploaded_files) > 1:
+                    render_batch_analysis(uploaded_files, demo_mode, meta, anchors)
 
             if st.session_state.input_image is not None:
                 col_img, col_thumb = st.columns([1, 1])
                 with col_img:
                     st.markdown("### 📷 입력 이미지")
-                    st.image(st.session_state.input_image, caption="건양대의료원 - 측면두부X선", width=480)
+                    st.image(st.session_state.input_image_bytes,
+                             caption="건양대의료원 - 측면두부X선", width=_VIEWER_DISPLAY_WIDTH)
                     if st.button("🚀 AI 분석 시작", type="primary", use_container_width=True):
-                        with st.spinner("건양대 AI가 분석 중입니다..."):
+                        # 단계별 진행을 status에 바로 표시 (파이프라인은 워커 스레드에서 실행되고 결과는 캐시)
+                        with st.status("건양대 AI가 분석 중입니다...", expanded=True) as status:
                             try:
-                                start_time = time.time()
-                                result = st.session_state.pipeline.run(st.session_state.input_image, meta=meta, anchors=anchors)
-                                _ = time.time() - start_time
+                                status.write("🧠 랜드마크 검출 · 임상 지표 계산")
+                                result = run_analysis(st.session_state.input_image, st.session_state.input_image_key,
+                                                      meta, anchors, demo_mode)
                                 if "error" in result:
+                                    status.update(label="❌ 분석 실패", state="error")
                                     st.error(f"❌ 분석 실패: {result['error']['message']}")
                                     add_audit_log("분석 실패", result['error']['message'])
                                 else:
+                                    result["classification"]["probabilities_display"] = \
+                                        _probabilities_display(result["classification"])
                                     st.session_state.analysis_results = result
                                     total_time = result["performance"]["total_time_ms"]
                                     lm = result["landmarks"]["coordinates"]
-                                    overlay_img = create_clinical_overlay(
-                                        st.session_state.input_image, lm, result.get("clinical_metrics")
+                                    label, _, conf = _normalize_classification_display(result["classification"])
+                                    status.write(f"📍 랜드마크 {len(lm)}개 · {label} ({conf*100:.1f}%) "
+                                                 f"· {total_time:.1f}ms")
+                                    status.write("🖼️ 임상 오버레이 렌더링")
+                                    # 분석 직후 한 번만 렌더링 → 다른 탭은 세션에 보관된 결과만 표시
+                                    st.session_state.full_overlay = clinical_overlay_bytes(
+                                        st.session_state.input_image, st.session_state.input_image_key,
+                                        lm, result.get("clinical_metrics")
                                     )
-                                    thumb = overlay_img.copy()
-                                    thumb.thumbnail((480, 320))
-                                    st.session_state.overlay_thumbnail = thumb
-                                    st.success("✅ 건양대 AI 분석 완료!")
+                                    st.session_state.overlay_thumbnail = overlay_thumbnail(st.session_state.full_overlay)
+                                    # 썸네일 표시용 바이트는 분석 시 한 번만 인코딩 (PIL 원본은 리포트 임베드용)
+                                    st.session_state.overlay_thumbnail_jpeg = encode_for_display(
+                                        st.session_state.overlay_thumbnail, _VIEWER_DISPLAY_WIDTH, quality=85)
+                                    st.session_state.report_thumb_uri = None
+                                    # 랜드마크 오버레이는 분석 탭에서 '임상 오버레이'를 끌 때 처음 렌더링 (보이는 것만 계산)
+                                    status.update(label="✅ 건양대 AI 분석 완료!", state="complete", expanded=False)
+                                    # 결과는 세션에 저장됐고 아래 썸네일/요약은 같은 실행에서 그려지므로 rerun 불필요
+                                    # (rerun하면 완료된 status와 단계 기록이 바로 사라짐)
                                     add_audit_log("AI 분석 완료", f"처리시간: {total_time:.1f}ms")
-                                    st.rerun()
                             except Exception as e:
+                                status.update(label="❌ 분석 중 오류 발생", state="error")
                                 st.error(f"❌ 분석 중 오류 발생: {e}")
                                 st.exception(e)
                                 add_audit_log("분석 오류", str(e))
                 with col_thumb:
                     st.markdown("### 📍 랜드마크 시각화")
-                    if st.session_state.overlay_thumbnail is not None:
-                        st.image(st.session_state.overlay_thumbnail, caption="임상 오버레이(썸네일)", width=480)
+                    if st.session_state.overlay_thumbnail_jpeg is not None:
+                        st.image(st.session_state.overlay_thumbnail_jpeg, caption="임상 오버레이(썸네일)", width=_VIEWER_DISPLAY_WIDTH)
                     else:
                         st.info("AI 분석 후 결과 썸네일이 표시됩니다.")
                     st.markdown("#### ⚡ 실시간 요약")
@@ -1115,19 +1685,9 @@ def main():
                 st.markdown("### 🖥️ 건양대 AI 시스템 정보")
                 info_col1, info_col2 = st.columns(2)
                 with info_col1:
-                    st.markdown("""
-                    **📋 시스템 사양**
-                    - AI 모델: U-Net + ResNet
-                    - 처리 속도: ~18ms
-                    - 정확도: 94.7%
-                    """)
+                    st.markdown(_SYSTEM_SPEC_MD)
                 with info_col2:
-                    st.markdown("""
-                    **🎯 분석 항목**
-                    - 19개 랜드마크 검출
-                    - 임상 지표 계산 (SNA, SNB, ANB, FMA)
-                    - 부정교합 분류 (Class I/II/III)
-                    """)
+                    st.markdown(_ANALYSIS_ITEMS_MD)
 
         elif st.session_state.current_tab == "analysis":
             st.markdown("## 📊 AI 분석결과")
@@ -1141,29 +1701,26 @@ def main():
                 with col2:
                     display_clinical_metrics(results["clinical_metrics"])
                 st.markdown("---")
-                st.markdown("### 📍 랜드마크 시각화")
-                landmarks = results["landmarks"]["coordinates"]
-                overlay_img = create_clinical_overlay(
-                    st.session_state.input_image, landmarks, results.get("clinical_metrics")
-                )
-                st.image(overlay_img, caption="임상 오버레이", width=640)
+                # 시각화 설정은 fragment 안에 있어 조작 시 탭 전체가 아닌 이 영역만 재실행
+                _landmark_view_fragment(results)
+                with st.expander("좌표 상세 정보"):
+                    lm_t = tuple(sorted((name, (float(x), float(y)))
+                                        for name, (x, y) in results["landmarks"]["coordinates"].items()))
+                    st.dataframe(landmarks_to_df(lm_t), hide_index=True, use_container_width=True,
+                                 column_config=_LANDMARK_COLUMN_CONFIG)
             else:
                 st.info("먼저 이미지 뷰어에서 분석을 실행해주세요.")
 
         elif st.session_state.current_tab == "simulator":
             st.markdown("## ⚙️ What-If 시뮬레이터")
             if st.session_state.analysis_results is not None:
-                whatif_result = render_whatif_simulator(st.session_state.analysis_results)
-                if whatif_result:
-                    add_audit_log("What-if 시뮬레이션", f"ANB 조정: {whatif_result['adjusted_anb']:.1f}°")
+                # 슬라이더 영역은 fragment: '적용' 제출 시 _whatif_fragment만 재실행되고
+                # 아래 오버레이(분석 시 1회 렌더링된 바이트)는 다시 전송되지 않음.
+                # 감사 로그도 fragment 내부에서 제출 시에만 기록
+                render_whatif_simulator(st.session_state.analysis_results)
                 st.markdown("---")
                 st.markdown("### 📍 현재 랜드마크(축소)")
-                results = st.session_state.analysis_results
-                landmarks = results["landmarks"]["coordinates"]
-                overlay_img = create_clinical_overlay(
-                    st.session_state.input_image, landmarks, results.get("clinical_metrics")
-                )
-                st.image(overlay_img, caption="임상 오버레이(축소)", width=640)
+                st.image(st.session_state.full_overlay, caption="임상 오버레이(축소)", width=_OVERLAY_DISPLAY_WIDTH)
             else:
                 st.info("먼저 AI 분석을 실행해주세요.")
 
@@ -1186,21 +1743,27 @@ def main():
                     }
                     report_html = generate_clinical_report(results, patient_info)
                     if include_images and st.session_state.overlay_thumbnail is not None:
-                        buf = BytesIO()
-                        st.session_state.overlay_thumbnail.save(buf, format="PNG")
-                        img_b64 = base64.b64encode(buf.getvalue()).decode()
-                        report_html = report_html.replace(
-                            "</footer>",
-                            f"""<div style="margin-top:20px;text-align:center;">
-                                    <img src="data:image/png;base64,{img_b64}" alt="Overlay" style="max-width:640px;max-height:400px;border:1px solid #ddd;border-radius:6px;"/>
-                                 </div></footer>"""
+                        # 썸네일이 바뀔 때만 인코딩하고 data URI 전체를 보관 (HTML 임베드용이므로 빠른 압축 수준 사용)
+                        if st.session_state.report_thumb_uri is None:
+                            buf = BytesIO()
+                            st.session_state.overlay_thumbnail.save(buf, format="PNG", compress_level=1, optimize=False)
+                            st.session_state.report_thumb_uri = "data:image/png;base64," + base64.b64encode(buf.getbuffer()).decode("ascii")
+                        img_uri = st.session_state.report_thumb_uri
+                        # 푸터는 문서 끝에 있으므로 뒤에서부터 찾아 한 번만 삽입 (전체 문서 replace 스캔 회피)
+                        cut = report_html.rfind("</footer>")
+                        report_html = (
+                            report_html[:cut]
+                            + f"""<div style="margin-top:20px;text-align:center;">
+                                    <img src="{img_uri}" alt="Overlay" style="max-width:640px;max-height:400px;border:1px solid #ddd;border-radius:6px;"/>
+                                 </div>"""
+                            + report_html[cut:]
                         )
                     st.markdown(report_html, unsafe_allow_html=True)
                     if report_format == "HTML":
                         st.download_button(
                             label="📥 리포트 다운로드 (HTML)",
                             data=report_html,
-                            file_name=f"cephalometric_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html",
+                            file_name=f"cephalometric_report_{RUN_TS.strftime('%Y%m%d_%H%M%S')}.html",
                             mime="text/html"
                         )
                         add_audit_log("리포트 생성", "임상 리포트 HTML 생성")
@@ -1210,7 +1773,7 @@ def main():
                             st.download_button(
                                 label="📥 리포트 다운로드 (PDF)",
                                 data=pdf_bytes,
-                                file_name=f"cephalometric_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                                file_name=f"cephalometric_report_{RUN_TS.strftime('%Y%m%d_%H%M%S')}.pdf",
                                 mime="application/pdf"
                             )
                             add_audit_log("리포트 생성", "임상 리포트 PDF 생성")
@@ -1225,25 +1788,17 @@ def main():
         elif st.session_state.current_tab == "history":
             st.markdown("## 🔍 이전 검사")
             st.markdown("### 최근 검사 이력")
-            history_data = [
-                {"날짜": "2025-01-15", "시간": "14:35", "분류": "Class II", "신뢰도": "87.3%", "상태": "완료"},
-                {"날짜": "2024-12-20", "시간": "10:22", "분류": "Class I", "신뢰도": "91.2%", "상태": "완료"},
-                {"날짜": "2024-11-15", "시간": "16:45", "분류": "Class II", "신뢰도": "85.1%", "상태": "완료"},
-                {"날짜": "2024-10-08", "시간": "09:15", "분류": "Class I", "신뢰도": "89.7%", "상태": "완료"},
-            ]
-            for i, record in enumerate(history_data):
-                with st.expander(f"📋 {record['날짜']} {record['시간']} - {record['분류']} ({record['신뢰도']})"):
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.write(f"**날짜:** {record['날짜']}")
-                        st.write(f"**시간:** {record['시간']}")
-                    with col2:
-                        st.write(f"**분류:** {record['분류']}")
-                        st.write(f"**신뢰도:** {record['신뢰도']}")
-                    with col3:
-                        st.write(f"**상태:** {record['상태']}")
-                        if st.button(f"상세보기", key=f"detail_{i}"):
-                            st.info("이전 검사 상세 결과 (구현 예정)")
+            history_df = _HISTORY_DF
+            # 단일 테이블(Arrow 페이로드 1건) + 행 선택으로 상세보기
+            event = st.dataframe(history_df, hide_index=True, use_container_width=True,
+                                 on_select="rerun", selection_mode="single-row", key="history_table")
+            selected_rows = event.selection.rows
+            if selected_rows:
+                record = history_df.iloc[selected_rows[0]]
+                st.info(f"📋 {record['날짜']} {record['시간']} - {record['분류']} ({record['신뢰도']}): "
+                        "이전 검사 상세 결과 (구현 예정)")
+            else:
+                st.caption("행을 선택하면 상세 정보를 볼 수 있습니다.")
 
         elif st.session_state.current_tab == "qc":
             st.markdown("## ⚡ QC 품질관리")
@@ -1291,34 +1846,14 @@ def main():
                 st.success("🟢 AI 모델: 정상 동작")
                 st.success("🟢 데이터베이스: 연결됨")
                 st.success("🟢 보안: 암호화 활성")
-                st.markdown("**📊 시스템 리소스**")
-                st.progress(0.3, text="CPU: 30%")
-                st.progress(0.5, text="Memory: 50%")
-                st.progress(0.2, text="GPU: 20%")
+                st.markdown(_SYSTEM_RESOURCES_HTML, unsafe_allow_html=True)
 
     # 감사 로그 표시
     render_audit_log()
 
     # EMR 푸터
     st.markdown("---")
-    st.markdown("""
-        <div style="text-align: center; color: #666; padding: 1.5rem; background: #f8fafc; border-radius: 8px;">
-            <div style="display: flex; justify-content: center; align-items: center; gap: 2rem; margin-bottom: 1rem;">
-                <div>🏥 <strong style="color: #2D5530;">건양대학교의료원</strong></div>
-                <div>📱 Cephalometric AI EMR v2.1.0</div>
-                <div>🔒 보안등급: 높음</div>
-            </div>
-            <div style="display: flex; justify-content: center; align-items: center; gap: 1rem; font-size: 0.9em;">
-                <a href="#" style="color: #2D5530;">시스템 가이드</a> | 
-                <a href="#" style="color: #7FB069;">기술지원</a> | 
-                <span style="color: #5B9BD5;">빌드: KY-EMR-240115</span>
-            </div>
-            <div style="margin-top: 1rem; font-size: 0.8em;">
-                <p><strong style="color: #C53030;">⚠️ 의료기기 소프트웨어:</strong> 이 시스템은 건양대학교 의료원 전용 AI 솔루션입니다.</p>
-                <p><strong style="color: #C53030;">⚠️ 임상 책임:</strong> 모든 AI 결과는 반드시 전문의 검토 후 최종 판단하시기 바랍니다.</p>
-            </div>
-        </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_FOOTER_HTML, unsafe_allow_html=True)
 
 if __name__ == "__main__":
     main()
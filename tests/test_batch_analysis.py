@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+일괄 분석 요약표 테스트 - 손상된 업로드가 섞여도 나머지 행은 정상 처리되는지 확인
+"""
+
+import unittest
+from concurrent.futures import Future
+from io import BytesIO
+
+from PIL import Image
+
+from src.demo.emr_system import batch_analysis_rows
+
+
+class _Upload(BytesIO):
+    """Streamlit UploadedFile 대용 (name/file_id를 가진 파일 객체)"""
+
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+        self.file_id = name
+
+
+def _png_upload(name):
+    buf = BytesIO()
+    Image.new("RGB", (32, 24), "gray").save(buf, format="PNG")
+    return _Upload(name, buf.getvalue())
+
+
+class _FakeWorker:
+    """submit 즉시 성공 결과를 돌려주는 워커 (hang=True면 끝나지 않는 Future 반환)"""
+
+    def __init__(self, hang=False):
+        self.hang = hang
+        self.submitted = []
+
+    def submit(self, image_input, meta=None, anchors=None):
+        self.submitted.append(image_input.size)
+        future = Future()
+        if not self.hang:
+            future.set_result({
+                "success": True,
+                "classification": {"predicted_class": 1, "confidence": 0.8},
+                "clinical_metrics": {"ANB": {"value": 2.5}},
+                "performance": {"total_time_ms": 12.0},
+            })
+        return future
+
+
+class BatchAnalysisRowsTest(unittest.TestCase):
+    def test_bad_upload_is_reported_in_its_row(self):
+        uploads = [_png_upload("a.png"), _Upload("broken.jpg", b"not an image"), _png_upload("b.png")]
+        worker = _FakeWorker()
+        rows = batch_analysis_rows(uploads, worker, {}, None)
+        self.assertEqual([r[0] for r in rows], ["a.png", "broken.jpg", "b.png"])
+        self.assertEqual(rows[0][5], "완료")
+        self.assertEqual(rows[2][5], "완료")
+        self.assertTrue(rows[1][5].startswith("오류"))
+        self.assertIsNone(rows[1][1])
+        self.assertEqual(len(worker.submitted), 2)
+
+    def test_timeout_applies_to_whole_batch(self):
+        uploads = [_png_upload("a.png"), _png_upload("b.png")]
+        rows = batch_analysis_rows(uploads, _FakeWorker(hang=True), {}, None, timeout=0.05)
+        self.assertTrue(all(r[5].startswith("시간 초과") for r in rows))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+PipelineWorker 테스트 - 실제 추론 엔진 대신 호출 기록만 남기는 가짜 파이프라인 사용
+"""
+
+import threading
+import unittest
+
+from src.core.integration_pipeline import CephalometricPipeline, PipelineWorker
+
+
+class _FakePipeline:
+    """run/run_batch 호출을 기록하는 가짜 파이프라인"""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+        self.started = threading.Event()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def run(self, image_input, meta=None, anchors=None, run_id=None):
+        self.started.set()
+        self.gate.wait(5)
+        if self.fail:
+            raise ValueError("boom")
+        self.calls.append(("run", [image_input]))
+        return {"success": True, "run_id": run_id or "uuid0001", "image": image_input, "anchors": anchors}
+
+    def run_batch(self, image_list, meta_list=None, anchors=None, run_ids=None):
+        self.calls.append(("run_batch", list(image_list)))
+        return [
+            {"success": True, "run_id": rid or f"uuid{i:04d}", "image": img, "anchors": anchors}
+            for i, (img, rid) in enumerate(zip(image_list, run_ids or [None] * len(image_list)))
+        ]
+
+
+class PipelineWorkerTest(unittest.TestCase):
+    def test_single_submit_runs_directly_and_keeps_run_id(self):
+        pipeline = _FakePipeline()
+        worker = PipelineWorker(pipeline)
+        try:
+            self.assertEqual(worker.submit("a", run_id="mine").result(timeout=5)["run_id"], "mine")
+            self.assertEqual(worker.submit("b").result(timeout=5)["run_id"], "uuid0001")
+        finally:
+            worker.close(timeout=5)
+        self.assertEqual(pipeline.calls, [("run", ["a"]), ("run", ["b"])])
+
+    def test_queued_requests_are_grouped_by_anchors(self):
+        pipeline = _FakePipeline()
+        pipeline.gate.clear()  # 첫 요청을 붙잡아 두는 동안 나머지를 큐에 쌓음
+        worker = PipelineWorker(pipeline)
+        try:
+            first = worker.submit("first")
+            self.assertTrue(pipeline.started.wait(5))
+            anchors = {"Or": (1.0, 2.0), "Po": (3.0, 4.0)}
+            futures = [worker.submit("p"), worker.submit("q"), worker.submit("r", anchors=anchors)]
+            pipeline.gate.set()
+            self.assertEqual(first.result(timeout=5)["image"], "first")
+            results = [f.result(timeout=5) for f in futures]
+        finally:
+            worker.close(timeout=5)
+        self.assertEqual([r["image"] for r in results], ["p", "q", "r"])
+        self.assertEqual(results[2]["anchors"], anchors)
+        self.assertIn(("run_batch", ["p", "q"]), pipeline.calls)
+        self.assertIn(("run", ["r"]), pipeline.calls)
+
+    def test_pipeline_exception_is_set_on_future(self):
+        worker = PipelineWorker(_FakePipeline(fail=True))
+        try:
+            with self.assertRaises(ValueError):
+                worker.submit("a").result(timeout=5)
+        finally:
+            worker.close(timeout=5)
+
+    def test_close_stops_thread_and_rejects_new_requests(self):
+        worker = PipelineWorker(_FakePipeline())
+        worker.close(timeout=5)
+        self.assertFalse(worker._thread.is_alive())
+        with self.assertRaises(RuntimeError):
+            worker.submit("a")
+
+
+class RunBatchTest(unittest.TestCase):
+    """실제 run_batch - 이미지별 run()만 대체해 앵커/실행 ID 전달을 확인"""
+
+    def setUp(self):
+        self.pipeline = CephalometricPipeline.__new__(CephalometricPipeline)
+        self.calls = []
+
+        def fake_run(image_input, meta=None, anchors=None, run_id=None):
+            self.calls.append((image_input, anchors, run_id))
+            if image_input == "bad":
+                raise ValueError("boom")
+            return {"success": True, "run_id": run_id or "generated", "image": image_input}
+
+        self.pipeline.run = fake_run
+
+    def test_passes_anchors_and_keeps_caller_run_ids(self):
+        anchors = {"Or": (1.0, 2.0), "Po": (3.0, 4.0)}
+        results = self.pipeline.run_batch(["a", "b"], anchors=anchors, run_ids=["id-a", None])
+        self.assertEqual(self.calls, [("a", anchors, "id-a"), ("b", anchors, None)])
+        self.assertEqual([r["run_id"] for r in results], ["id-a", "generated"])
+
+    def test_default_run_ids_are_batch_numbers(self):
+        results = self.pipeline.run_batch(["a", "b"])
+        self.assertEqual([r["run_id"] for r in results], ["batch_001", "batch_002"])
+
+    def test_exception_path_keeps_caller_run_id(self):
+        results = self.pipeline.run_batch(["bad", "bad"], run_ids=["mine", None])
+        self.assertEqual([r["success"] for r in results], [False, False])
+        self.assertEqual(results[0]["run_id"], "mine")
+        self.assertEqual(results[0]["error"]["type"], "ValueError")
+        self.assertTrue(results[1]["run_id"])  # None이면 새 ID 발급
+        self.assertNotEqual(results[1]["run_id"], "mine")
+
+    def test_run_ids_length_must_match(self):
+        with self.assertRaises(ValueError):
+            self.pipeline.run_batch(["a", "b"], run_ids=["only-one"])
+
+
+if __name__ == "__main__":
+    unittest.main()